@@ -0,0 +1,101 @@
+from typing import Any,Sequence
+from datetime import datetime
+from fastapi import Request,Response,status
+from cache import RESPONSE_CACHE,CachedResponse
+from database import reads_from_primary
+from settings import ENVIRONMENT
+from .responses import encode_json,response_headers
+
+CACHE_HEADER = 'X-Cache'
+
+def _response(cached:CachedResponse,status:str) -> Response:
+    return Response(
+        content=cached.body,
+        media_type='application/json',
+        headers={**cached.headers,CACHE_HEADER:status}
+    )
+
+def make_etag(version:datetime) -> str:
+    '''
+    weak entity tag of a representation from the instant of its last change
+    '''
+    return f'W/"{int(version.timestamp()*1_000_000):x}"'
+
+def _matches(if_none_match:str | None,etag:str) -> bool:
+    # weak comparison, as the only kind of tags served are weak
+    if if_none_match is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag.removeprefix('W/') in [tag.removeprefix('W/') for tag in tags]
+
+class ResponseCaching:
+
+    def __init__(self,request:Request):
+        '''
+        caches the serialized response of a read endpoint, keyed by its url,
+        and answers its conditional requests
+
+        the clients that wrote recently aren't served from the cache, so they
+        see their own writes, and the responses read from a replica are only
+        cached once they can't be behind the last changes
+        '''
+        self._request = request
+        self._key = request.url.path + '?' + '&'.join(sorted(request.url.query.split('&')))
+        self._if_none_match = request.headers.get('if-none-match')
+        self._stamp:int | None = None
+        self._etag:str | None = None
+
+    def _not_modified(self,etag:str) -> Response | None:
+        if not _matches(self._if_none_match,etag):
+            return None
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED,headers={'ETag':etag})
+
+    async def lookup(self) -> Response | None:
+        '''
+        gets the cached response of the request, or 'Not Modified' if the
+        client has it, None if it must be built
+        '''
+        cached,self._stamp = await RESPONSE_CACHE.get(self._key)
+        if cached is None or reads_from_primary(self._request):
+            return None
+        etag = cached.headers.get('ETag')
+        not_modified = None if etag is None else self._not_modified(etag)
+        return not_modified or _response(cached,'HIT')
+
+    def validate(self,version:datetime | None) -> Response | None:
+        '''
+        gets 'Not Modified' if the client has the version of the content, the
+        response built otherwise is tagged with it
+        '''
+        if version is None:
+            return None
+        self._etag = make_etag(version)
+        return self._not_modified(self._etag)
+
+    async def store(
+        self,
+        content:Any,
+        schema:Any,
+        tags:Sequence[str],
+        response:Response | None=None
+    ) -> Response:
+        '''
+        serializes the content with its schema and caches it with the given tags,
+        the headers set in 'response' are cached along with it
+        '''
+        headers = response_headers(response)
+        if not self._etag is None:
+            headers['ETag'] = self._etag
+        cached = CachedResponse(encode_json(content,schema),headers)
+        # a healthy replica is at most this far behind the primary
+        max_delay = 0.0
+        if getattr(self._request.state,'reads_replica',False):
+            max_delay = ENVIRONMENT.REPLICA_MAX_LAG_SECONDS + ENVIRONMENT.REPLICA_CHECK_INTERVAL_SECONDS
+        await RESPONSE_CACHE.set(self._key,self._stamp,tags,cached,max_delay)
+        return _response(cached,'MISS')
+
+def get_response_caching(request:Request) -> ResponseCaching:
+    '''
+    gets the response caching dependency
+    '''
+    return ResponseCaching(request)
@@ -1,7 +1,14 @@
 from typing import Sequence
-from fastapi import APIRouter,HTTPException,status,Depends,Query
+from fastapi import APIRouter,HTTPException,status,Depends,Query,Response
+from fastapi.responses import StreamingResponse
 from models import User
-from schemas import CommentCreateSchema,CommentUpdateSchema,CommentSchema
+from schemas import (
+    CommentCreateSchema,
+    CommentUpdateSchema,
+    CommentSchema,
+    CommentBulkCreateSchema,
+    BulkItemResultSchema
+)
 from security import get_current_user,get_authorization_service
 from services import (
     CommentService,
@@ -11,8 +18,14 @@ from services import (
     get_post_service
 )
 from settings import ENVIRONMENT
+from middlewares import TimedRoute
+from cache import entity_tag
+from ..pagination import NEXT_CURSOR_HEADER,decode_cursor,set_next_cursor
+from ..export import ExportFormat,export_response
+from ..caching import ResponseCaching,get_response_caching
+from ..responses import json_response
 
-router = APIRouter(prefix='/comments',tags=['comments'])
+router = APIRouter(prefix='/comments',tags=['comments'],route_class=TimedRoute)
 
 @router.post(
     '',
@@ -26,8 +39,8 @@ async def post_comment(
     post_service:PostService=Depends(get_post_service),
     current_user:User=Depends(get_current_user)
 ):
-    db_post = await post_service.get_by_id(post_id)
-    if db_post is None:
+    # only the existence of the post is checked, without loading it
+    if not await post_service.exists(post_id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f'Not post with id "{post_id}" found'
@@ -40,20 +53,66 @@ async def post_comment(
         )
     return db_comment
 
+@router.post(
+    '/bulk',
+    status_code=status.HTTP_201_CREATED,
+    response_model=Sequence[BulkItemResultSchema[CommentSchema]]
+)
+async def post_comments(
+    comments:Sequence[CommentBulkCreateSchema],
+    comment_service:CommentService=Depends(get_comment_service),
+    current_user:User=Depends(get_current_user)
+):
+    if len(comments) > ENVIRONMENT.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Only up to {ENVIRONMENT.BULK_MAX_ITEMS} items can be created at once'
+        )
+    results = await comment_service.create_many(comments,author_id=current_user.id)
+    if results is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='The items conflict with the existing data'
+        )
+    return results
+
 @router.get(
     '',
     status_code=status.HTTP_200_OK,
     response_model=Sequence[CommentSchema]
 )
 async def get_comments(
+    response:Response,
     page:int=Query(0,ge=0,description='page of results'),
+    cursor:str | None=Query(None,description=f'opaque cursor of the next page, taken from the "{NEXT_CURSOR_HEADER}" header'),
     include_deleted:bool=Query(False,description='include deleted items'),
     service:CommentService=Depends(get_comment_service)
 ):
-    return await service.get_all(
+    results = await service.get_all(
         ENVIRONMENT.PAGES_SIZE,
         page*ENVIRONMENT.PAGES_SIZE,
-        include_deleted
+        include_deleted,
+        decode_cursor(cursor) if cursor else None
+    )
+    set_next_cursor(response,results,ENVIRONMENT.PAGES_SIZE)
+    return json_response(results,Sequence[CommentSchema],response)
+
+@router.get(
+    '/export',
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={200:{'content':{'application/x-ndjson':{},'text/csv':{}}}}
+)
+async def export_comments(
+    export_format:ExportFormat=Query('ndjson',alias='format',description='format of the export'),
+    include_deleted:bool=Query(False,description='include deleted items'),
+    service:CommentService=Depends(get_comment_service)
+):
+    return export_response(
+        service.export(ENVIRONMENT.EXPORT_BATCH_SIZE,include_deleted),
+        service.export_fields,
+        export_format,
+        'comments'
     )
 
 @router.get(
@@ -64,15 +123,22 @@ async def get_comments(
 async def get_by_id(
     comment_id:str,
     include_deleted:bool=Query(False,description='include deleted items'),
-    service:CommentService=Depends(get_comment_service)
+    service:CommentService=Depends(get_comment_service),
+    caching:ResponseCaching=Depends(get_response_caching)
 ):
+    cached = await caching.lookup()
+    if not cached is None:
+        return cached
+    not_modified = caching.validate(await service.get_version(comment_id,include_deleted))
+    if not not_modified is None:
+        return not_modified
     db_comment = await service.get_by_id(comment_id,include_deleted)
     if db_comment is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='Not comment with id "{comment_id}" found'
         )
-    return db_comment
+    return await caching.store(db_comment,CommentSchema,[entity_tag('comment',db_comment.id)])
 
 @router.put(
     '/{comment_id}',
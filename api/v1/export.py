@@ -0,0 +1,52 @@
+from typing import AsyncIterator,Literal,Sequence
+from datetime import datetime
+from fastapi.responses import StreamingResponse
+import csv
+import io
+import json
+
+ExportFormat = Literal['ndjson','csv']
+
+MEDIA_TYPES = {
+    'ndjson':'application/x-ndjson',
+    'csv':'text/csv'
+}
+
+def _json_default(value):
+    if isinstance(value,datetime):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+async def _ndjson_chunks(batches:AsyncIterator[Sequence[dict]]) -> AsyncIterator[str]:
+    async for rows in batches:
+        yield ''.join(
+            json.dumps(dict(row),default=_json_default) + '\n'
+            for row in rows
+        )
+
+async def _csv_chunks(batches:AsyncIterator[Sequence[dict]],fields:Sequence[str]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer,fieldnames=fields)
+    writer.writeheader()
+    yield buffer.getvalue()
+    async for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+def export_response(
+    batches:AsyncIterator[Sequence[dict]],
+    fields:Sequence[str],
+    export_format:ExportFormat,
+    name:str
+) -> StreamingResponse:
+    '''
+    streams the batches of rows as a ndjson or csv file download
+    '''
+    chunks = _ndjson_chunks(batches) if export_format == 'ndjson' else _csv_chunks(batches,fields)
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[export_format],
+        headers={'Content-Disposition':f'attachment; filename="{name}.{export_format}"'}
+    )
@@ -0,0 +1,122 @@
+from typing import Sequence
+from datetime import datetime
+from fastapi import HTTPException,Response,status
+import base64
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+def _encode(*parts:str) -> str:
+    return base64.urlsafe_b64encode('|'.join(parts).encode()).decode()
+
+def _decode(cursor:str,size:int) -> list[str]:
+    try:
+        parts = base64.urlsafe_b64decode(cursor.encode()).decode().split('|',size - 1)
+    except ValueError:
+        parts = []
+    if len(parts) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Invalid cursor'
+        )
+    return parts
+
+def encode_cursor(created_at:datetime,instance_id:str) -> str:
+    '''
+    encodes the keyset position of an item into an opaque cursor
+    '''
+    return _encode(created_at.isoformat(),instance_id)
+
+def decode_cursor(cursor:str) -> tuple[datetime,str]:
+    '''
+    decodes an opaque cursor into its keyset position (created_at, id)
+
+    raises a 400 http exception if the cursor is malformed
+    '''
+    created_at,instance_id = _decode(cursor,2)
+    try:
+        return datetime.fromisoformat(created_at),instance_id
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Invalid cursor'
+        )
+
+def encode_rank_cursor(rank:float,instance_id:str) -> str:
+    '''
+    encodes the position of an item in a ranked result into an opaque cursor
+    '''
+    return _encode(repr(rank),instance_id)
+
+def decode_rank_cursor(cursor:str) -> tuple[float,str]:
+    '''
+    decodes an opaque cursor into its ranked position (rank, id)
+
+    raises a 400 http exception if the cursor is malformed
+    '''
+    rank,instance_id = _decode(cursor,2)
+    try:
+        return float(rank),instance_id
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Invalid cursor'
+        )
+
+def encode_count_cursor(count:int,instance_id:str) -> str:
+    '''
+    encodes the position of an item in a result ordered by a count into an
+    opaque cursor
+    '''
+    return _encode(str(count),instance_id)
+
+def decode_count_cursor(cursor:str) -> tuple[int,str]:
+    '''
+    decodes an opaque cursor into its position (count, id)
+
+    raises a 400 http exception if the cursor is malformed
+    '''
+    count,instance_id = _decode(cursor,2)
+    try:
+        return int(count),instance_id
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Invalid cursor'
+        )
+
+def set_next_cursor(response:Response,items:Sequence,page_size:int) -> None:
+    '''
+    sets the cursor of the next page in the response headers when
+    there could be more results after the given page
+    '''
+    if len(items) < page_size or len(items) == 0:
+        return
+    last = items[-1]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at,last.id)
+
+def set_next_rank_cursor(response:Response,items:Sequence,page_size:int) -> None:
+    '''
+    same as 'set_next_cursor' for results ordered by rank
+    '''
+    if len(items) < page_size or len(items) == 0:
+        return
+    last = items[-1]
+    response.headers[NEXT_CURSOR_HEADER] = encode_rank_cursor(last.rank,last.id)
+
+def set_next_count_cursor(response:Response,items:Sequence,page_size:int) -> None:
+    '''
+    same as 'set_next_cursor' for post summaries ordered by comment count
+    '''
+    if len(items) < page_size or len(items) == 0:
+        return
+    last = items[-1]
+    response.headers[NEXT_CURSOR_HEADER] = encode_count_cursor(last.comment_count,last.id)
+
+def set_next_activity_cursor(response:Response,items:Sequence,page_size:int) -> None:
+    '''
+    same as 'set_next_cursor' for post summaries ordered by last activity
+    '''
+    if len(items) < page_size or len(items) == 0:
+        return
+    last = items[-1]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.last_comment_at or last.created_at,last.id)
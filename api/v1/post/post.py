@@ -1,12 +1,42 @@
 from typing import Sequence
-from fastapi import APIRouter,HTTPException,status,Depends,Query
+from fastapi import APIRouter,HTTPException,status,Depends,Query,Response
+from fastapi.responses import StreamingResponse
 from models import User
-from schemas import PostCreateSchema,PostUpdateSchema,PostSchema
+from schemas import (
+    PostCreateSchema,
+    PostUpdateSchema,
+    PostSchema,
+    PostSummarySchema,
+    PostSearchResultSchema,
+    PostSummarySort,
+    CommentSchema,
+    BulkItemResultSchema
+)
 from security import get_current_user,get_authorization_service
-from services import PostService,get_post_service,AuthorizationService
+from services import (
+    PostService,
+    CommentService,
+    AuthorizationService,
+    get_post_service,
+    get_comment_service
+)
 from settings import ENVIRONMENT
+from middlewares import TimedRoute
+from ..pagination import (
+    NEXT_CURSOR_HEADER,
+    decode_cursor,
+    decode_rank_cursor,
+    decode_count_cursor,
+    set_next_cursor,
+    set_next_rank_cursor,
+    set_next_count_cursor,
+    set_next_activity_cursor
+)
+from ..export import ExportFormat,export_response
+from ..caching import ResponseCaching,get_response_caching
+from ..responses import json_response
 
-router = APIRouter(prefix='/posts',tags=['posts'])
+router = APIRouter(prefix='/posts',tags=['posts'],route_class=TimedRoute)
 
 @router.post(
     '/create',
@@ -26,21 +56,119 @@ async def create_post(
         )
     return await service.create(post,author_id=current_user.id)
 
+@router.post(
+    '/bulk',
+    response_model=Sequence[BulkItemResultSchema[PostSchema]],
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_posts(
+    posts:Sequence[PostCreateSchema],
+    service:PostService=Depends(get_post_service),
+    current_user:User=Depends(get_current_user)
+):
+    if len(posts) > ENVIRONMENT.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Only up to {ENVIRONMENT.BULK_MAX_ITEMS} items can be created at once'
+        )
+    results = await service.create_many(posts,author_id=current_user.id)
+    if results is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='The items conflict with the existing data'
+        )
+    return results
+
 @router.get(
     '',
     status_code=status.HTTP_200_OK,
     response_model=Sequence[PostSchema]
 )
 async def get_posts(
+    response:Response,
+    page:int=Query(0,ge=0,description='page of results'),
+    cursor:str | None=Query(None,description=f'opaque cursor of the next page, taken from the "{NEXT_CURSOR_HEADER}" header'),
+    include_deleted:bool=Query(False,description='include deleted items'),
+    service:PostService=Depends(get_post_service)
+):
+    results = await service.get_all(
+        ENVIRONMENT.PAGES_SIZE,
+        page*ENVIRONMENT.PAGES_SIZE,
+        include_deleted,
+        decode_cursor(cursor) if cursor else None
+    )
+    set_next_cursor(response,results,ENVIRONMENT.PAGES_SIZE)
+    return json_response(results,Sequence[PostSchema],response)
+
+@router.get(
+    '/export',
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={200:{'content':{'application/x-ndjson':{},'text/csv':{}}}}
+)
+async def export_posts(
+    export_format:ExportFormat=Query('ndjson',alias='format',description='format of the export'),
+    include_deleted:bool=Query(False,description='include deleted items'),
+    service:PostService=Depends(get_post_service)
+):
+    return export_response(
+        service.export(ENVIRONMENT.EXPORT_BATCH_SIZE,include_deleted),
+        service.export_fields,
+        export_format,
+        'posts'
+    )
+
+@router.get(
+    '/search',
+    status_code=status.HTTP_200_OK,
+    response_model=Sequence[PostSearchResultSchema]
+)
+async def search_posts(
+    response:Response,
+    q:str=Query(...,min_length=1,description='text to search in the title and content of the posts'),
+    cursor:str | None=Query(None,description=f'opaque cursor of the next page, taken from the "{NEXT_CURSOR_HEADER}" header'),
+    include_deleted:bool=Query(False,description='include deleted items'),
+    service:PostService=Depends(get_post_service)
+):
+    results = await service.search(
+        q,
+        ENVIRONMENT.PAGES_SIZE,
+        include_deleted,
+        decode_rank_cursor(cursor) if cursor else None
+    )
+    set_next_rank_cursor(response,results,ENVIRONMENT.PAGES_SIZE)
+    return json_response(results,Sequence[PostSearchResultSchema],response)
+
+@router.get(
+    '/summary',
+    status_code=status.HTTP_200_OK,
+    response_model=Sequence[PostSummarySchema]
+)
+async def get_posts_summary(
+    response:Response,
     page:int=Query(0,ge=0,description='page of results'),
+    cursor:str | None=Query(None,description=f'opaque cursor of the next page, taken from the "{NEXT_CURSOR_HEADER}" header'),
     include_deleted:bool=Query(False,description='include deleted items'),
+    sort:PostSummarySort=Query('created_at',description='order of the posts, oldest first, most commented first or most recently commented first'),
     service:PostService=Depends(get_post_service)
 ):
-    return await service.get_all(
+    after = None
+    if cursor:
+        after = decode_count_cursor(cursor) if sort == 'most_discussed' else decode_cursor(cursor)
+    results = await service.get_summaries(
         ENVIRONMENT.PAGES_SIZE,
         page*ENVIRONMENT.PAGES_SIZE,
-        include_deleted
+        include_deleted,
+        after,
+        sort
     )
+    if sort == 'most_discussed':
+        set_next_count_cursor(response,results,ENVIRONMENT.PAGES_SIZE)
+    elif sort == 'recently_active':
+        set_next_activity_cursor(response,results,ENVIRONMENT.PAGES_SIZE)
+    else:
+        set_next_cursor(response,results,ENVIRONMENT.PAGES_SIZE)
+    return json_response(results,Sequence[PostSummarySchema],response)
 
 @router.get(
     '/{post_id}',
@@ -50,15 +178,50 @@ async def get_posts(
 async def get_by_id(
     post_id:str,
     include_deleted:bool=Query(False,description='include deleted items'),
-    service:PostService=Depends(get_post_service)
+    service:PostService=Depends(get_post_service),
+    caching:ResponseCaching=Depends(get_response_caching)
 ):
-    db_post = await service.get_by_id(post_id,include_deleted)
-    if db_post is None:
+    cached = await caching.lookup()
+    if not cached is None:
+        return cached
+    not_modified = caching.validate(await service.get_version(post_id,include_deleted))
+    if not not_modified is None:
+        return not_modified
+    detail = await service.get_detail(post_id,include_deleted)
+    if detail is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f'Not post with id "{post_id}" found'
         )
-    return db_post
+    db_post,tags = detail
+    return await caching.store(db_post,PostSchema,tags)
+
+@router.get(
+    '/{post_id}/comments',
+    status_code=status.HTTP_200_OK,
+    response_model=Sequence[CommentSchema]
+)
+async def get_post_comments(
+    post_id:str,
+    response:Response,
+    cursor:str | None=Query(None,description=f'opaque cursor of the next page, taken from the "{NEXT_CURSOR_HEADER}" header'),
+    include_deleted:bool=Query(False,description='include deleted items'),
+    post_service:PostService=Depends(get_post_service),
+    comment_service:CommentService=Depends(get_comment_service)
+):
+    if not await post_service.exists(post_id,include_deleted):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'Not post with id "{post_id}" found'
+        )
+    results = await comment_service.get_by_post(
+        post_id,
+        ENVIRONMENT.PAGES_SIZE,
+        include_deleted,
+        decode_cursor(cursor) if cursor else None
+    )
+    set_next_cursor(response,results,ENVIRONMENT.PAGES_SIZE)
+    return json_response(results,Sequence[CommentSchema],response)
 
 @router.get(
     '/title/{post_title}',
@@ -68,15 +231,20 @@ async def get_by_id(
 async def get_by_title(
     post_title:str,
     include_deleted:bool=Query(False,description='include deleted items'),
-    service:PostService=Depends(get_post_service)
+    service:PostService=Depends(get_post_service),
+    caching:ResponseCaching=Depends(get_response_caching)
 ):
-    db_post = await service.get_by_title(post_title,include_deleted)
-    if db_post is None:
+    cached = await caching.lookup()
+    if not cached is None:
+        return cached
+    detail = await service.get_detail_by_title(post_title,include_deleted)
+    if detail is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f'Not post with title "{post_title}" found'
         )
-    return db_post
+    db_post,tags = detail
+    return await caching.store(db_post,PostSchema,tags)
 
 @router.put(
     '/{post_id}',
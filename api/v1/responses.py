@@ -0,0 +1,55 @@
+from typing import Any
+from functools import lru_cache
+from fastapi import Response,status
+from pydantic import TypeAdapter
+from middlewares import timed_phase
+
+@lru_cache
+def _adapter(schema:Any) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+def encode_json(content:Any,schema:Any) -> bytes:
+    '''
+    encodes the content to json with the serializer of its schema, in a single
+    pass and without validating it again
+
+    the content must be trusted output of the services, already built with
+    the schema, the encoding is reported as the 'serialize' phase of the request
+    '''
+    with timed_phase('serialize'):
+        return _adapter(schema).dump_json(content)
+
+def response_headers(response:Response | None) -> dict[str,str]:
+    '''
+    headers set by an endpoint in its injected response
+    '''
+    if response is None:
+        return {}
+    return {
+        key:value
+        for key,value in response.headers.items()
+        if key != 'content-length'
+    }
+
+def json_response(
+    content:Any,
+    schema:Any,
+    response:Response | None=None,
+    status_code:int=status.HTTP_200_OK
+) -> Response:
+    '''
+    response with the content encoded once with its schema, it skips the
+    validation and serialization of the response model, which is still
+    declared in the route for the docs
+
+    params:
+        content:Any -> trusted output of the services
+        schema:Any -> schema of the content, the response model of the route
+        response:Response -> injected response with the headers set by the endpoint
+    '''
+    return Response(
+        content=encode_json(content,schema),
+        status_code=status_code,
+        media_type='application/json',
+        headers=response_headers(response)
+    )
@@ -1,12 +1,16 @@
 from typing import Sequence
-from fastapi import APIRouter,HTTPException,status,Depends,Query
+from fastapi import APIRouter,HTTPException,status,Depends,Query,Response
 from models import User
-from schemas import TagCreateSchema,TagUpdateSchema,TagSchema
+from schemas import TagCreateSchema,TagUpdateSchema,TagSchema,PostSummarySchema,BulkItemResultSchema
 from security import get_current_user
-from services import TagService,get_tag_service
+from services import TagService,PostService,get_tag_service,get_post_service
 from settings import ENVIRONMENT
+from middlewares import TimedRoute
+from cache import entity_tag,list_tag
+from ..pagination import NEXT_CURSOR_HEADER,decode_cursor,set_next_cursor
+from ..caching import ResponseCaching,get_response_caching
 
-router = APIRouter(prefix='/tags',tags=['tags'])
+router = APIRouter(prefix='/tags',tags=['tags'],route_class=TimedRoute)
 
 @router.post(
     '',
@@ -26,21 +30,53 @@ async def post_tag(
         )
     return await service.create(tag)
 
+@router.post(
+    '/bulk',
+    status_code=status.HTTP_201_CREATED,
+    response_model=Sequence[BulkItemResultSchema[TagSchema]]
+)
+async def post_tags(
+    tags:Sequence[TagCreateSchema],
+    current_user:User=Depends(get_current_user),
+    service:TagService=Depends(get_tag_service)
+):
+    if len(tags) > ENVIRONMENT.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Only up to {ENVIRONMENT.BULK_MAX_ITEMS} items can be created at once'
+        )
+    results = await service.create_many(tags)
+    if results is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='The items conflict with the existing data'
+        )
+    return results
+
 @router.get(
     '',
     status_code=status.HTTP_200_OK,
     response_model=Sequence[TagSchema]
 )
 async def get_tags(
+    response:Response,
     page:int=Query(0,ge=0,description='page of results'),
+    cursor:str | None=Query(None,description=f'opaque cursor of the next page, taken from the "{NEXT_CURSOR_HEADER}" header'),
     include_deleted:bool=Query(False,description='include deleted items'),
-    service:TagService=Depends(get_tag_service)
+    service:TagService=Depends(get_tag_service),
+    caching:ResponseCaching=Depends(get_response_caching)
 ):
-    return await service.get_all(
+    cached = await caching.lookup()
+    if not cached is None:
+        return cached
+    results = await service.get_all(
         ENVIRONMENT.PAGES_SIZE,
         page*ENVIRONMENT.PAGES_SIZE,
-        include_deleted
+        include_deleted,
+        decode_cursor(cursor) if cursor else None
     )
+    set_next_cursor(response,results,ENVIRONMENT.PAGES_SIZE)
+    return await caching.store(results,Sequence[TagSchema],[list_tag('tag')],response)
 
 @router.get(
     '/{tag_id}',
@@ -50,15 +86,22 @@ async def get_tags(
 async def get_by_id(
     tag_id:str,
     include_deleted:bool=Query(False,description='include deleted items'),
-    service:TagService=Depends(get_tag_service)
+    service:TagService=Depends(get_tag_service),
+    caching:ResponseCaching=Depends(get_response_caching)
 ):
+    cached = await caching.lookup()
+    if not cached is None:
+        return cached
+    not_modified = caching.validate(await service.get_version(tag_id,include_deleted))
+    if not not_modified is None:
+        return not_modified
     db_tag = await service.get_by_id(tag_id,include_deleted)
     if db_tag is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f'Not tag with id "{tag_id}" found'
         )
-    return db_tag
+    return await caching.store(db_tag,TagSchema,[entity_tag('tag',db_tag.id)])
 
 @router.get(
     '/name/{tag_name}',
@@ -78,6 +121,51 @@ async def get_by_name(
         )
     return db_tag
 
+@router.get(
+    '/{tag_name}/posts',
+    status_code=status.HTTP_200_OK,
+    response_model=Sequence[PostSummarySchema]
+)
+async def get_tag_posts(
+    tag_name:str,
+    response:Response,
+    cursor:str | None=Query(None,description=f'opaque cursor of the next page, taken from the "{NEXT_CURSOR_HEADER}" header'),
+    include_deleted:bool=Query(False,description='include deleted items'),
+    tag_service:TagService=Depends(get_tag_service),
+    post_service:PostService=Depends(get_post_service),
+    caching:ResponseCaching=Depends(get_response_caching)
+):
+    cached = await caching.lookup()
+    if not cached is None:
+        return cached
+    # the tag is resolved once, its posts are paged by its id
+    db_tag = await tag_service.get_by_name(tag_name,include_deleted)
+    if db_tag is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'Not tag with name "{tag_name}" found'
+        )
+    results = await post_service.get_summaries_by_tag(
+        db_tag.id,
+        ENVIRONMENT.PAGES_SIZE,
+        include_deleted,
+        decode_cursor(cursor) if cursor else None
+    )
+    set_next_cursor(response,results,ENVIRONMENT.PAGES_SIZE)
+    return await caching.store(
+        results,
+        Sequence[PostSummarySchema],
+        [
+            entity_tag('tag',db_tag.id),
+            list_tag('post'),
+            # the posts listed and the names of its authors, the posts are
+            # invalidated by the changes of its tags and comments
+            *[entity_tag('post',result.id) for result in results],
+            *{entity_tag('user',result.author_id) for result in results}
+        ],
+        response
+    )
+
 @router.put(
     '/{tag_id}',
     status_code=status.HTTP_202_ACCEPTED,
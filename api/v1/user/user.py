@@ -1,5 +1,5 @@
 from typing import Sequence
-from fastapi import APIRouter,HTTPException,status,Depends,Query
+from fastapi import APIRouter,HTTPException,status,Depends,Query,Response
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
 from models import User
@@ -9,15 +9,20 @@ from schemas import (
     TokenSchema,
     UserUpdateSchema
 )
-from security import create_access_token,get_current_user
+from security import create_user_access_token,get_current_user
 from settings import ENVIRONMENT
+from middlewares import TimedRoute
+from cache import entity_tag
+from ..pagination import NEXT_CURSOR_HEADER,decode_cursor,set_next_cursor
+from ..caching import ResponseCaching,get_response_caching
+from ..responses import json_response
 from services import UserService,get_user_service
 from .user_http_exceptions import (
     USER_ALREADY_EXISTS_ECXCEPTION,
     EMAIL_ALREADY_REGISTERED_EXCEPTION
 )
 
-router = APIRouter(prefix='/users',tags=['users'])
+router = APIRouter(prefix='/users',tags=['users'],route_class=TimedRoute)
 
 @router.post(
     '/register',
@@ -53,26 +58,39 @@ async def login_for_access_token(
             headers={'WWW-Authorization':'Bearer'}
         )
     access_token_expires = timedelta(minutes=float(ENVIRONMENT.TOKEN_LIFE_TIME))
-    access_token = create_access_token(
-        data={'sub':user.username},
-        expires_delta=access_token_expires
-    )
+    access_token = create_user_access_token(user,expires_delta=access_token_expires)
     return {'access_token':access_token,'token_type':'bearer'}
 
+@router.post(
+    '/logout',
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def logout(
+    service:UserService=Depends(get_user_service),
+    current_user:User=Depends(get_current_user)
+):
+    result = await service.revoke_tokens(current_user.id)
+    return {'messsage':'tokens revoked' if result else 'tokens were not revoked'}
+
 @router.get(
     '',
     response_model=Sequence[UserSchema]
 )
 async def get_users(
+    response:Response,
     page:int = Query(0,description='page of results',ge=0),
+    cursor:str | None=Query(None,description=f'opaque cursor of the next page, taken from the "{NEXT_CURSOR_HEADER}" header'),
     include_deleted:bool = Query(False,description='includes deleted items'),
     service:UserService=Depends(get_user_service)
 ):
-    return await service.get_all(
+    results = await service.get_all(
         ENVIRONMENT.PAGES_SIZE,
         page*ENVIRONMENT.PAGES_SIZE,
-        include_deleted
+        include_deleted,
+        decode_cursor(cursor) if cursor else None
     )
+    set_next_cursor(response,results,ENVIRONMENT.PAGES_SIZE)
+    return json_response(results,Sequence[UserSchema],response)
 
 @router.get(
     '/{user_id}',
@@ -81,15 +99,22 @@ async def get_users(
 async def get_by_id(
     user_id:str,
     include_deleted:bool=Query(False,description='include deleted items'),
-    service:UserService=Depends(get_user_service)
+    service:UserService=Depends(get_user_service),
+    caching:ResponseCaching=Depends(get_response_caching)
 ):
+    cached = await caching.lookup()
+    if not cached is None:
+        return cached
+    not_modified = caching.validate(await service.get_version(user_id,include_deleted))
+    if not not_modified is None:
+        return not_modified
     db_user = await service.get_by_id(user_id,include_deleted)
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f'Not user with id "{user_id}" found'
         )
-    return db_user
+    return await caching.store(db_user,UserSchema,[entity_tag('user',db_user.id)])
 
 @router.put(
     '/update',
@@ -0,0 +1,67 @@
+'''
+compares the cpu time spent encoding a page of posts by the default response
+path of fastapi and by 'api.v1.responses.json_response'
+
+run it from the root of the project:
+    python -m benchmarks.json_responses
+'''
+from typing import Sequence
+from datetime import datetime,timezone
+from time import process_time
+import asyncio
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from schemas import PostSchema,PostTagNestedSchema,PostCommentNestedSchema
+from settings import ENVIRONMENT
+from api.v1.responses import json_response
+
+ITERATIONS = 200
+
+def _page() -> list[PostSchema]:
+    now = datetime.now(timezone.utc)
+    return [
+        PostSchema(
+            id=f'post-{index}',
+            author_id='author',
+            title=f'Post number {index}',
+            content='lorem ipsum dolor sit amet '*40,
+            created_at=now,
+            updated_at=now,
+            tags=[PostTagNestedSchema(name=f'tag{tag}',description='a tag of the post') for tag in range(3)],
+            comments=[
+                PostCommentNestedSchema(author='commenter',content='a comment of the post')
+                for _ in range(ENVIRONMENT.EMBEDDED_COMMENTS_SIZE)
+            ]
+        )
+        for index in range(ENVIRONMENT.PAGES_SIZE)
+    ]
+
+async def _default_path(field,page) -> bytes:
+    # what fastapi does with the value returned by the endpoint
+    content = await serialize_response(field=field,response_content=page)
+    return JSONResponse(content).body
+
+def _fast_path(page) -> bytes:
+    return json_response(page,Sequence[PostSchema]).body
+
+def _measure(function) -> float:
+    start = process_time()
+    for _ in range(ITERATIONS):
+        function()
+    return (process_time() - start) / ITERATIONS * 1000
+
+def main():
+    page = _page()
+    field = create_model_field(name='response',type_=Sequence[PostSchema],mode='serialization')
+    loop = asyncio.new_event_loop()
+    default = _measure(lambda:loop.run_until_complete(_default_path(field,page)))
+    fast = _measure(lambda:_fast_path(page))
+    loop.close()
+    print(f'posts by page: {len(page)}')
+    print(f'default response path: {default:.3f} ms of cpu by request')
+    print(f'json_response:         {fast:.3f} ms of cpu by request')
+    print(f'saved:                 {default - fast:.3f} ms ({(1 - fast / default)*100:.1f}%)')
+
+if __name__ == '__main__':
+    main()
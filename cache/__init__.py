@@ -0,0 +1,46 @@
+from settings import ENVIRONMENT
+from metrics import counter,gauge
+from .lru import LRUCache
+from .claims import ClaimsCache
+from .redis import RedisClient,RedisError,RedisUnavailable
+from .response import ResponseCache,CachedResponse,entity_tag,list_tag
+
+# current token version of the users, the only state checked to accept a token
+TOKEN_VERSIONS:LRUCache[str,int] = LRUCache(
+    ENVIRONMENT.PRINCIPAL_CACHE_SIZE,
+    ENVIRONMENT.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+def collect_token_versions() -> list[str]:
+    '''
+    lines of the metrics of the cache of the token versions of the users
+    '''
+    stats = TOKEN_VERSIONS.stats()
+    lookups = stats['hits'] + stats['misses']
+    return [
+        *counter('principal_cache_hits_total','Token versions of users found in cache',[({},stats['hits'])]),
+        *counter('principal_cache_misses_total','Token versions of users loaded from the database',[({},stats['misses'])]),
+        *gauge(
+            'principal_cache_hit_ratio',
+            'Ratio of the token versions of users found in cache',
+            [({},stats['hits'] / lookups if lookups > 0 else 0.0)]
+        ),
+        *counter(
+            'principal_cache_evictions_total',
+            'Entries evicted to keep the cache bounded',
+            [({},stats['evictions'])]
+        ),
+        *gauge('principal_cache_entries','Token versions of users in cache',[({},stats['size'])])
+    ]
+
+TOKEN_CLAIMS_CACHE = ClaimsCache(ENVIRONMENT.TOKEN_CLAIMS_CACHE_SIZE)
+
+RESPONSE_CACHE = ResponseCache(
+    ENVIRONMENT.RESPONSE_CACHE_SIZE,
+    ENVIRONMENT.RESPONSE_CACHE_TTL_SECONDS,
+    RedisClient(
+        ENVIRONMENT.RESPONSE_CACHE_REDIS_URL,
+        pool_size=ENVIRONMENT.REDIS_POOL_SIZE,
+        cooldown=ENVIRONMENT.REDIS_COOLDOWN_SECONDS
+    ) if ENVIRONMENT.RESPONSE_CACHE_REDIS_URL else None
+)
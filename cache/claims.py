@@ -0,0 +1,62 @@
+from typing import Any
+from hashlib import sha256
+from time import time
+from metrics import counter,gauge
+from .lru import LRUCache
+
+class ClaimsCache:
+
+    def __init__(self,max_size:int):
+        '''
+        bounded cache of the verified claims of the access tokens, keyed by a
+        hash of the token and kept until the token expires, so a reused token
+        skips the signature check and the parsing
+
+        params:
+            max_size:int -> max number of tokens kept in cache, 0 to disable it
+        '''
+        self._entries:LRUCache[bytes,dict[str,Any]] = LRUCache(max_size)
+
+    def _key(self,token:str) -> bytes:
+        return sha256(token.encode()).digest()
+
+    def get(self,token:str) -> dict[str,Any] | None:
+        '''
+        gets the verified claims of a token, None if they aren't cached or
+        the token has expired
+        '''
+        return self._entries.get(self._key(token))
+
+    def set(self,token:str,claims:dict[str,Any]) -> None:
+        '''
+        caches the verified claims of a token until its expiration, the
+        tokens without expiration aren't cached
+        '''
+        expires_at = claims.get('exp')
+        if expires_at is None:
+            return
+        ttl = expires_at - time()
+        if ttl > 0:
+            self._entries.set(self._key(token),claims,ttl)
+
+    def collect(self) -> list[str]:
+        '''
+        lines of the metrics of the cache
+        '''
+        stats = self._entries.stats()
+        lookups = stats['hits'] + stats['misses']
+        return [
+            *counter('token_claims_cache_hits_total','Tokens with its claims found in cache',[({},stats['hits'])]),
+            *counter('token_claims_cache_misses_total','Tokens verified and parsed',[({},stats['misses'])]),
+            *gauge(
+                'token_claims_cache_hit_ratio',
+                'Ratio of the tokens with its claims found in cache',
+                [({},stats['hits'] / lookups if lookups > 0 else 0.0)]
+            ),
+            *counter(
+                'token_claims_cache_evictions_total',
+                'Entries evicted to keep the cache bounded',
+                [({},stats['evictions'])]
+            ),
+            *gauge('token_claims_cache_entries','Tokens with its claims in cache',[({},stats['size'])])
+        ]
@@ -0,0 +1,79 @@
+from typing import Generic,Hashable,TypeVar
+from collections import OrderedDict
+from time import monotonic
+
+KeyType = TypeVar('KeyType',bound=Hashable)
+ValueType = TypeVar('ValueType')
+
+class LRUCache(Generic[KeyType,ValueType]):
+
+    def __init__(self,max_size:int,ttl:float | None=None):
+        '''
+        bounded in-process cache, evicts the least recently used entry
+        when full and expires the entries older than 'ttl' seconds
+
+        params:
+            max_size -> max number of entries
+            ttl -> life time of the entries in seconds, None to never expire
+        '''
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries:OrderedDict[KeyType,tuple[float,ValueType]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self,key:KeyType) -> ValueType | None:
+        '''
+        gets the value of the key, None if it isn't cached or expired
+        '''
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+        expires_at,value = entry
+        if expires_at < monotonic():
+            del self._entries[key]
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return value
+
+    def set(self,key:KeyType,value:ValueType,ttl:float | None=None) -> None:
+        '''
+        caches a value, 'ttl' overrides the default life time of the cache
+        '''
+        if self._max_size <= 0:
+            return
+        ttl = self._ttl if ttl is None else ttl
+        expires_at = float('inf') if ttl is None else monotonic() + ttl
+        self._entries[key] = (expires_at,value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def invalidate(self,key:KeyType) -> None:
+        '''
+        removes a key from the cache
+        '''
+        self._entries.pop(key,None)
+
+    def clear(self) -> None:
+        '''
+        removes all the entries
+        '''
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        '''
+        size, hits, misses and evictions of the cache
+        '''
+        return {
+            'size':len(self._entries),
+            'max_size':self._max_size,
+            'hits':self._hits,
+            'misses':self._misses,
+            'evictions':self._evictions
+        }
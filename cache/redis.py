@@ -0,0 +1,172 @@
+from urllib.parse import urlparse
+from time import monotonic
+import asyncio
+
+class RedisError(Exception):
+    '''
+    error replied by the redis server
+    '''
+
+class RedisUnavailable(ConnectionError):
+    '''
+    the server failed recently and its commands are skipped until it cools down
+    '''
+
+Connection = tuple[asyncio.StreamReader,asyncio.StreamWriter]
+
+def _encode_command(*args) -> bytes:
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg,bytes) else str(arg).encode()
+        parts.append(b'$%d\r\n%s\r\n' % (len(data),data))
+    return b''.join(parts)
+
+async def _read_reply(reader:asyncio.StreamReader):
+    line = await reader.readline()
+    if not line.endswith(b'\r\n'):
+        raise ConnectionError('connection closed by the redis server')
+    kind,value = line[:1],line[1:-2]
+    if kind == b'+':
+        return value
+    if kind == b'-':
+        raise RedisError(value.decode())
+    if kind == b':':
+        return int(value)
+    if kind == b'$':
+        size = int(value)
+        if size < 0:
+            return None
+        try:
+            data = await reader.readexactly(size + 2)
+        except asyncio.IncompleteReadError:
+            raise ConnectionError('connection closed by the redis server')
+        return data[:-2]
+    if kind == b'*':
+        size = int(value)
+        if size < 0:
+            return None
+        return [await _read_reply(reader) for _ in range(size)]
+    raise RedisError(f'unexpected reply: {line!r}')
+
+class RedisClient:
+
+    def __init__(self,url:str,timeout:float=1.0,pool_size:int=4,cooldown:float=5.0):
+        '''
+        minimal client of the redis protocol over a small pool of connections,
+        the commands of a call are pipelined in one connection and the calls
+        run at once up to the size of the pool
+
+        a connection that fails is dropped, and after a failure the commands
+        are rejected right away with 'RedisUnavailable' for a cooldown, so the
+        callers fall back without waiting for the timeout on each request
+
+        params:
+            url:str -> url of the server, 'redis://[:password@]host[:port][/db]'
+            timeout:float -> max seconds to wait for the replies of a command
+            pool_size:int -> max number of connections
+            cooldown:float -> seconds the commands are skipped after a failure
+        '''
+        parsed = urlparse(url)
+        self._host = parsed.hostname or 'localhost'
+        self._port = parsed.port or 6379
+        self._password = parsed.password
+        self._db = int(parsed.path.lstrip('/') or 0)
+        self._timeout = timeout
+        self._cooldown = cooldown
+        self._slots = asyncio.Semaphore(max(pool_size,1))
+        self._idle:list[Connection] = []
+        self._available_at = 0.0
+
+    @property
+    def available(self) -> bool:
+        '''
+        if the server isn't cooling down after a failure
+        '''
+        return monotonic() >= self._available_at
+
+    async def _connect(self) -> Connection:
+        reader,writer = await asyncio.open_connection(self._host,self._port)
+        commands = []
+        if not self._password is None:
+            commands.append(('AUTH',self._password))
+        if self._db != 0:
+            commands.append(('SELECT',self._db))
+        for command in commands:
+            writer.write(_encode_command(*command))
+            await _read_reply(reader)
+        return reader,writer
+
+    async def _pipeline(self,connection:Connection,commands:list[tuple]) -> tuple[list,list]:
+        reader,writer = connection
+        writer.write(b''.join(_encode_command(*command) for command in commands))
+        await writer.drain()
+        replies = []
+        errors = []
+        # all the replies are read even after an error, to keep the connection in sync
+        for _ in commands:
+            try:
+                replies.append(await _read_reply(reader))
+            except RedisError as e:
+                replies.append(None)
+                errors.append(e)
+        return replies,errors
+
+    async def pipeline(self,*commands:tuple) -> list:
+        '''
+        sends many commands at once and returns their replies
+        '''
+        if not self.available:
+            raise RedisUnavailable(f'redis server {self._host}:{self._port} is cooling down after a failure')
+        async with self._slots:
+            connection = self._idle.pop() if len(self._idle) > 0 else None
+            try:
+                if connection is None:
+                    connection = await asyncio.wait_for(self._connect(),self._timeout)
+                replies,errors = await asyncio.wait_for(self._pipeline(connection,list(commands)),self._timeout)
+            except BaseException as e:
+                # the replies of the connection are out of sync with the commands
+                if not connection is None:
+                    await self._close_connection(connection)
+                if isinstance(e,Exception):
+                    self._available_at = monotonic() + self._cooldown
+                raise
+            self._idle.append(connection)
+        if len(errors) > 0:
+            raise errors[0]
+        return replies
+
+    async def execute(self,*args):
+        '''
+        sends a command and returns its reply
+        '''
+        replies = await self.pipeline(args)
+        return replies[0]
+
+    async def get(self,key:str) -> bytes | None:
+        return await self.execute('GET',key)
+
+    async def mget(self,*keys:str) -> list[bytes | None]:
+        return await self.execute('MGET',*keys)
+
+    async def set(self,key:str,value:bytes | str | int,ttl:float | None=None) -> None:
+        if ttl is None:
+            await self.execute('SET',key,value)
+        else:
+            await self.execute('SET',key,value,'PX',int(ttl*1000))
+
+    async def _close_connection(self,connection:Connection) -> None:
+        _,writer = connection
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+    async def close(self) -> None:
+        '''
+        closes the idle connections
+        '''
+        idle = self._idle
+        self._idle = []
+        for connection in idle:
+            await self._close_connection(connection)
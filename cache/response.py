@@ -0,0 +1,251 @@
+from typing import NamedTuple,Sequence
+from collections import OrderedDict
+import asyncio
+import json
+import logging
+from time import time
+from metrics import counter,gauge
+from .lru import LRUCache
+from .redis import RedisClient,RedisError,RedisUnavailable
+
+logger = logging.getLogger(__name__)
+
+# errors of the shared tier, the cache keeps working with the local tier alone
+SHARED_ERRORS = (OSError,RedisError,asyncio.TimeoutError)
+
+CLOCK_KEY = 'response-cache:clock'
+
+def entity_tag(entity:str,instance_id:str) -> str:
+    '''
+    tag of the responses that show an instance
+    '''
+    return f'{entity}:{instance_id}'
+
+def list_tag(entity:str) -> str:
+    '''
+    tag of the responses that list the instances of an entity
+    '''
+    return f'{entity}:list'
+
+class CachedResponse(NamedTuple):
+    body:bytes
+    headers:dict[str,str]
+
+class CacheEntry(NamedTuple):
+    stamp:int
+    tags:tuple[str,...]
+    response:CachedResponse
+
+def _encode_entry(entry:CacheEntry) -> bytes:
+    header = json.dumps({
+        'stamp':entry.stamp,
+        'tags':entry.tags,
+        'headers':entry.response.headers
+    })
+    return header.encode() + b'\n' + entry.response.body
+
+def _decode_version(value:bytes | None) -> tuple[int,float]:
+    # version of a tag in the shared tier and the instant it was invalidated
+    if value is None:
+        return 0,0.0
+    version,_,invalidated_at = value.partition(b':')
+    return int(version),float(invalidated_at or 0)
+
+def _decode_entry(data:bytes) -> CacheEntry:
+    header,body = data.split(b'\n',1)
+    fields = json.loads(header)
+    return CacheEntry(fields['stamp'],tuple(fields['tags']),CachedResponse(body,fields['headers']))
+
+class ResponseCache:
+
+    def __init__(self,max_size:int,ttl:float,shared:RedisClient | None=None):
+        '''
+        two tier cache of serialized responses, a bounded in-process LRU and an
+        optional shared redis tier
+
+        the entries are tagged with the data they show and invalidated by tag:
+        each invalidation takes a new value of a clock as the version of its tags,
+        and an entry is valid while none of its tags has a version newer than
+        the clock value taken before building it. With a shared tier the clock
+        and the versions live in it, so the invalidations reach all the workers
+
+        while the shared tier fails the lookups miss and nothing is stored, as
+        the invalidations of the other workers can't be seen
+
+        the responses built from data that can be behind the last changes, like
+        the reads of a replica, are only cached once their tags have settled,
+        when no tag was invalidated within the max delay of the data
+
+        params:
+            max_size:int -> max number of entries in the local tier
+            ttl:float -> life time of the entries in seconds
+            shared:RedisClient -> client of the shared tier, None to use only
+                the local tier
+        '''
+        self._ttl = ttl
+        self._entries:LRUCache[str,CacheEntry] = LRUCache(max_size,ttl)
+        self._shared = shared
+        self._clock = 0
+        self._max_versions = max(max_size,1)
+        # version of each tag and the instant it was invalidated
+        self._versions:OrderedDict[str,tuple[int,float]] = OrderedDict()
+        # version and instant of the tags forgotten to keep the versions bounded
+        self._versions_floor = (0,0.0)
+        self._hits = {'local':0,'shared':0}
+        self._misses = 0
+        self._invalidations = 0
+        self._shared_errors = 0
+        self._shared_skipped = 0
+        self._unsettled = 0
+
+    def _version(self,tag:str) -> tuple[int,float]:
+        return self._versions.get(tag,self._versions_floor)
+
+    def _shared_failed(self,error:Exception) -> None:
+        if isinstance(error,RedisUnavailable):
+            # the shared tier is cooling down after a failure already logged
+            self._shared_skipped += 1
+            return
+        self._shared_errors += 1
+        logger.warning('shared response cache unavailable: %s',error)
+
+    async def get(self,key:str) -> tuple[CachedResponse | None,int | None]:
+        '''
+        gets the valid cached response of a key, and the stamp to store the
+        response built when it isn't cached, None if it can't be stored
+        '''
+        entry = self._entries.get(key)
+        tier = 'local'
+        if self._shared is None:
+            stamp = self._clock
+            versions = [] if entry is None else [self._version(tag)[0] for tag in entry.tags]
+        else:
+            try:
+                if entry is None:
+                    tier = 'shared'
+                    data = await self._shared.get(f'response-cache:entry:{key}')
+                    entry = None if data is None else _decode_entry(data)
+                tags = [] if entry is None else [f'response-cache:tag:{tag}' for tag in entry.tags]
+                values = await self._shared.mget(CLOCK_KEY,*tags)
+            except SHARED_ERRORS as e:
+                self._shared_failed(e)
+                self._misses += 1
+                return None,None
+            stamp = int(values[0] or 0)
+            versions = [_decode_version(value)[0] for value in values[1:]]
+        if entry is None or any(version > entry.stamp for version in versions):
+            self._misses += 1
+            return None,stamp
+        if tier == 'shared':
+            self._entries.set(key,entry)
+        self._hits[tier] += 1
+        return entry.response,stamp
+
+    async def _invalidated_at(self,tags:Sequence[str]) -> float:
+        # last instant any of the tags was invalidated
+        if self._shared is None:
+            return max((self._version(tag)[1] for tag in tags),default=0.0)
+        values = await self._shared.mget(*[f'response-cache:tag:{tag}' for tag in tags])
+        return max((_decode_version(value)[1] for value in values),default=0.0)
+
+    async def set(
+        self,
+        key:str,
+        stamp:int | None,
+        tags:Sequence[str],
+        response:CachedResponse,
+        max_delay:float=0.0
+    ) -> None:
+        '''
+        caches a response built after taking the given stamp
+
+        params:
+            max_delay:float -> max seconds the data of the response can be behind
+                the last changes, the response isn't cached if any of its tags was
+                invalidated within them
+        '''
+        if stamp is None:
+            return
+        entry = CacheEntry(stamp,tuple(tags),response)
+        try:
+            if max_delay > 0 and len(tags) > 0 and time() - await self._invalidated_at(tags) < max_delay:
+                self._unsettled += 1
+                return
+            self._entries.set(key,entry)
+            if not self._shared is None:
+                await self._shared.set(f'response-cache:entry:{key}',_encode_entry(entry),self._ttl)
+        except SHARED_ERRORS as e:
+            self._shared_failed(e)
+
+    async def invalidate(self,*tags:str) -> None:
+        '''
+        invalidates all the responses with any of the tags
+        '''
+        self._invalidations += len(tags)
+        if self._shared is None:
+            self._clock += 1
+            for tag in tags:
+                self._versions[tag] = (self._clock,time())
+                self._versions.move_to_end(tag)
+            while len(self._versions) > self._max_versions:
+                _,version = self._versions.popitem(last=False)
+                self._versions_floor = max(self._versions_floor,version)
+            return
+        try:
+            clock = await self._shared.execute('INCR',CLOCK_KEY)
+            await self._shared.pipeline(*[
+                ('SET',f'response-cache:tag:{tag}',f'{clock}:{time()}','PX',int(self._ttl*1000))
+                for tag in tags
+            ])
+        except SHARED_ERRORS as e:
+            self._shared_failed(e)
+
+    async def close(self) -> None:
+        '''
+        closes the connections to the shared tier
+        '''
+        if not self._shared is None:
+            await self._shared.close()
+
+    def collect(self) -> list[str]:
+        '''
+        lines of the metrics of the cache
+        '''
+        stats = self._entries.stats()
+        hits = sum(self._hits.values())
+        lookups = hits + self._misses
+        return [
+            *counter(
+                'response_cache_hits_total',
+                'Responses served from the cache',
+                [({'tier':tier},value) for tier,value in self._hits.items()]
+            ),
+            *counter('response_cache_misses_total','Responses not found in the cache',[({},self._misses)]),
+            *gauge(
+                'response_cache_hit_ratio',
+                'Ratio of the responses served from the cache',
+                [({},hits / lookups if lookups > 0 else 0.0)]
+            ),
+            *counter(
+                'response_cache_evictions_total',
+                'Entries evicted from the local tier to keep it bounded',
+                [({},stats['evictions'])]
+            ),
+            *gauge('response_cache_entries','Entries in the local tier',[({},stats['size'])]),
+            *counter('response_cache_invalidations_total','Invalidated tags',[({},self._invalidations)]),
+            *counter(
+                'response_cache_unsettled_total',
+                'Responses not cached because its data could be behind a recent change',
+                [({},self._unsettled)]
+            ),
+            *counter(
+                'response_cache_shared_errors_total',
+                'Failed operations in the shared tier',
+                [({},self._shared_errors)]
+            ),
+            *counter(
+                'response_cache_shared_skipped_total',
+                'Operations skipped while the shared tier cooled down after a failure',
+                [({},self._shared_skipped)]
+            )
+        ]
@@ -1 +1,11 @@
-from .session import BaseModel,ENGINE,get_database_session
\ No newline at end of file
+from .session import (
+    BaseModel,
+    ENGINE,
+    REPLICAS,
+    DB_ADMISSION,
+    READ_YOUR_WRITES,
+    get_database_session,
+    reads_from_primary
+)
+from .pool import InstrumentedPool,collect_pool_metrics
+from .admission import AdmissionControl,collect_admission_metrics
\ No newline at end of file
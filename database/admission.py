@@ -0,0 +1,120 @@
+from typing import Sequence
+from collections import deque
+from time import perf_counter
+import asyncio
+from metrics import HistogramFamily,counter,gauge,histogram
+
+# time in seconds waited in queue to use the database, by pool
+ADMISSION_WAIT = HistogramFamily(('pool',),(0.001,0.005,0.01,0.05,0.1,0.25,0.5,1.0,2.5,5.0))
+
+class AdmissionControl:
+
+    def __init__(self,name:str,capacity:int,max_queue:int,wait_timeout:float):
+        '''
+        bounds the requests using a database at once to the connections of
+        its pool, the requests over it wait in a bounded queue for a short time
+        and are rejected when the queue is full or the wait runs out, instead
+        of piling up waiting for a connection
+
+        the slots are handed in order to the queued requests when released
+
+        params:
+            name:str -> name of the pool in the metrics
+            capacity:int -> max number of requests admitted at once
+            max_queue:int -> max number of requests waiting for a slot
+            wait_timeout:float -> max seconds a request waits for a slot
+        '''
+        self.name = name
+        self._capacity = capacity
+        self._max_queue = max_queue
+        self._wait_timeout = wait_timeout
+        self._in_use = 0
+        self._waiters:deque[asyncio.Future] = deque()
+        self._admitted = 0
+        self._rejected = {'queue_full':0,'timeout':0}
+        self._wait = ADMISSION_WAIT.labels(name)
+
+    def _expire(self,waiter:asyncio.Future) -> None:
+        if waiter.done():
+            return
+        self._waiters.remove(waiter)
+        self._rejected['timeout'] += 1
+        waiter.set_result(False)
+
+    async def acquire(self) -> bool:
+        '''
+        takes a slot, waiting for one if all are in use, returns False if the
+        request was rejected
+        '''
+        if self._in_use < self._capacity and len(self._waiters) == 0:
+            self._in_use += 1
+            self._admitted += 1
+            return True
+        if len(self._waiters) >= self._max_queue:
+            self._rejected['queue_full'] += 1
+            return False
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        timer = loop.call_later(self._wait_timeout,self._expire,waiter)
+        start = perf_counter()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.cancelled():
+                self._waiters.remove(waiter)
+            elif waiter.result():
+                # the slot was handed right before the request was cancelled
+                self.release()
+            raise
+        finally:
+            timer.cancel()
+            self._wait.observe(perf_counter() - start)
+        if waiter.result():
+            self._admitted += 1
+        return waiter.result()
+
+    def release(self) -> None:
+        '''
+        releases a slot, handing it to the first queued request if any
+        '''
+        while len(self._waiters) > 0:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self._in_use -= 1
+
+def collect_admission_metrics(controls:Sequence[AdmissionControl]) -> list[str]:
+    '''
+    lines of the metrics of the admission controls, labeled by pool
+    '''
+    samples = [
+        ('db_admission_capacity','Requests admitted to use the database at once',lambda control:control._capacity),
+        ('db_admission_in_use','Requests using the database',lambda control:control._in_use),
+        ('db_admission_queue_depth','Requests waiting to use the database',lambda control:len(control._waiters)),
+        ('db_admission_max_queue','Max requests waiting to use the database',lambda control:control._max_queue)
+    ]
+    lines = []
+    for metric,help,value in samples:
+        lines.extend(gauge(metric,help,[({'pool':control.name},value(control)) for control in controls]))
+    lines.extend(counter(
+        'db_admission_admitted_total',
+        'Requests admitted to use the database',
+        [({'pool':control.name},control._admitted) for control in controls]
+    ))
+    lines.extend(counter(
+        'db_admission_rejected_total',
+        'Requests rejected because the database was saturated',
+        [
+            ({'pool':control.name,'reason':reason},value)
+            for control in controls
+            for reason,value in control._rejected.items()
+        ]
+    ))
+    lines.extend(histogram(
+        'db_admission_wait_seconds',
+        'Time waited in queue to use the database',
+        ADMISSION_WAIT
+    ))
+    return lines
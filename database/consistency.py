@@ -0,0 +1,73 @@
+from typing import Callable
+from time import time
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import Response
+from cache import LRUCache
+
+# cookie with the instant until the client reads from the primary after a write
+READ_PRIMARY_COOKIE = 'read_primary_until'
+
+class ReadYourWrites:
+
+    def __init__(self,window:float,max_principals:int):
+        '''
+        keeps the clients that wrote recently reading from the primary, so they
+        see their own writes while the replicas catch up
+
+        the writers are kept by the user of their bearer token in a cache that
+        forgets them after the window, the clients without a token are kept by
+        a cookie with the end of the window, which is also honored for the
+        users
+
+        params:
+            window:float -> seconds a client reads from the primary after a write
+            max_principals:int -> max number of users kept in-process
+        '''
+        self._window = window
+        self._writers:LRUCache[str,bool] = LRUCache(max_principals,window)
+        self._principal:Callable[[str],str | None] | None = None
+
+    def use_principal(self,principal:Callable[[str],str | None]) -> None:
+        '''
+        sets the function that gets the id of the user of a bearer token, None
+        if the token isn't valid
+        '''
+        self._principal = principal
+
+    def _principal_of(self,request:Request) -> str | None:
+        if self._principal is None:
+            return None
+        scheme,_,token = Headers(scope=request.scope).get('authorization','').partition(' ')
+        if scheme.lower() != 'bearer' or not token:
+            return None
+        return self._principal(token)
+
+    def wrote(self,request:Request,response:Response) -> None:
+        '''
+        starts the window of the client of a request that writes
+        '''
+        if self._window <= 0:
+            return
+        principal = self._principal_of(request)
+        if not principal is None:
+            self._writers.set(principal,True)
+        response.set_cookie(
+            READ_PRIMARY_COOKIE,
+            str(time() + self._window),
+            max_age=int(self._window),
+            httponly=True,
+            samesite='lax'
+        )
+
+    def reads_from_primary(self,request:Request) -> bool:
+        '''
+        whether the client wrote recently, so it must see its own writes
+        '''
+        try:
+            if time() < float(request.cookies.get(READ_PRIMARY_COOKIE,0)):
+                return True
+        except ValueError:
+            pass
+        principal = self._principal_of(request)
+        return not principal is None and not self._writers.get(principal) is None
@@ -0,0 +1,73 @@
+from time import perf_counter
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from typing import Sequence
+from metrics import HistogramFamily,counter,gauge,histogram
+
+# time in seconds waited to get a connection from the pool, by pool
+POOL_WAIT = HistogramFamily(('pool',),(0.001,0.005,0.01,0.05,0.1,0.5,1.0,5.0,10.0,30.0,60.0))
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    '''
+    connection pool that measures how long it takes to check out connections
+    and how many checkouts time out, labeled by the name of the pool
+
+    the name is given to the engine as 'pool_name', like
+    'create_async_engine(url,poolclass=InstrumentedPool,pool_name="primary")'
+    '''
+
+    def __init__(self,creator,pool_name:str='primary',**kwargs):
+        super().__init__(creator,**kwargs)
+        self.pool_name = pool_name
+        self.timeouts = 0
+        self._wait = POOL_WAIT.labels(pool_name)
+
+    def recreate(self):
+        # the disposed pool is replaced by a new one that keeps its metrics
+        pool = super().recreate()
+        pool.pool_name = self.pool_name
+        pool.timeouts = self.timeouts
+        pool._wait = self._wait
+        return pool
+
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self._wait.observe(perf_counter() - start)
+
+def collect_pool_metrics(engines:Sequence[AsyncEngine],timeout:float) -> list[str]:
+    '''
+    lines of the metrics of the connection pools of the engines, labeled by pool
+    '''
+    pools = [
+        engine.sync_engine.pool
+        for engine in engines
+        if isinstance(engine.sync_engine.pool,InstrumentedPool)
+    ]
+    samples = [
+        ('db_pool_size','Configured size of the connection pool',lambda pool:pool.size()),
+        ('db_pool_checked_out','Connections in use',lambda pool:pool.checkedout()),
+        ('db_pool_checked_in','Idle connections in the pool',lambda pool:pool.checkedin()),
+        ('db_pool_overflow','Connections open over the pool size',lambda pool:max(pool.overflow(),0)),
+        ('db_pool_timeout_seconds','Max time waited for a connection',lambda pool:timeout)
+    ]
+    lines = []
+    for metric,help,value in samples:
+        lines.extend(gauge(metric,help,[({'pool':pool.pool_name},value(pool)) for pool in pools]))
+    lines.extend(counter(
+        'db_pool_checkout_timeouts_total',
+        'Checkouts that timed out waiting for a connection',
+        [({'pool':pool.pool_name},pool.timeouts) for pool in pools]
+    ))
+    lines.extend(histogram(
+        'db_pool_checkout_wait_seconds',
+        'Time waited to get a connection from the pool',
+        POOL_WAIT
+    ))
+    return lines
@@ -0,0 +1,132 @@
+from time import monotonic
+import asyncio
+import logging
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine,AsyncSession,async_sessionmaker
+from metrics import gauge
+from .admission import AdmissionControl
+
+logger = logging.getLogger(__name__)
+
+# seconds the replica is behind the primary, 0 when it has replayed all it received
+LAG_QUERY = text(
+    'SELECT CASE '
+    'WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()),0) '
+    'END'
+)
+
+class Replica:
+
+    def __init__(
+        self,
+        name:str,
+        engine:AsyncEngine,
+        admission:AdmissionControl,
+        max_lag:float,
+        check_interval:float
+    ):
+        '''
+        read replica of the database, it's healthy while its lag is under 'max_lag'
+        seconds, the lag is checked in background every 'check_interval' seconds
+
+        params:
+            name:str -> name of the replica in the metrics and logs
+            engine:AsyncEngine -> engine connected to the replica
+            admission:AdmissionControl -> bounds the requests using the pool of the replica
+            max_lag:float -> max seconds the replica can be behind the primary
+            check_interval:float -> seconds between lag checks
+        '''
+        self.name = name
+        self.engine = engine
+        self.admission = admission
+        self.sessionmaker = async_sessionmaker(
+            engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autoflush=False,
+            autocommit=False,
+        )
+        self._max_lag = max_lag
+        self._check_interval = check_interval
+        self._checked_at:float | None = None
+        self._check:asyncio.Task | None = None
+        self.lag:float | None = None
+
+    @property
+    def healthy(self) -> bool:
+        '''
+        whether the replica has been reached and its lag is acceptable
+        '''
+        return not self.lag is None and self.lag <= self._max_lag
+
+    def refresh(self) -> None:
+        '''
+        starts a lag check in background if the last one is too old, the
+        current state is kept until it finishes
+        '''
+        if not self._check is None:
+            return
+        if not self._checked_at is None and monotonic() - self._checked_at < self._check_interval:
+            return
+        self._checked_at = monotonic()
+        self._check = asyncio.get_running_loop().create_task(self._check_lag())
+
+    async def _check_lag(self) -> None:
+        try:
+            async with self.engine.connect() as conn:
+                lag = await asyncio.wait_for(conn.scalar(LAG_QUERY),self._check_interval)
+            self.lag = float(lag)
+        except Exception as e:
+            if not self.lag is None:
+                logger.warning('replica %s is unreachable: %s',self.name,e)
+            self.lag = None
+        finally:
+            self._checked_at = monotonic()
+            self._check = None
+
+class ReplicaSet:
+
+    def __init__(self,replicas:list[Replica]):
+        '''
+        read replicas of the database, used in turns while they are healthy
+        '''
+        self.replicas = replicas
+        self._next = 0
+
+    def next(self) -> Replica | None:
+        '''
+        next healthy replica, None if there isn't any and the reads must fall
+        back to the primary
+        '''
+        for replica in self.replicas:
+            replica.refresh()
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self._next % len(self.replicas)]
+            self._next += 1
+            if replica.healthy:
+                return replica
+        return None
+
+    async def dispose(self) -> None:
+        '''
+        closes the connections of all the replicas
+        '''
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def collect(self) -> list[str]:
+        '''
+        lines of the metrics of the replicas
+        '''
+        lines = gauge(
+            'db_replica_healthy',
+            'Whether the replica receives reads',
+            [({'replica':replica.name},int(replica.healthy)) for replica in self.replicas]
+        )
+        lines.extend(gauge(
+            'db_replica_lag_seconds',
+            'Seconds the replica is behind the primary',
+            [({'replica':replica.name},replica.lag) for replica in self.replicas if not replica.lag is None]
+        ))
+        return lines
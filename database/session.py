@@ -1,6 +1,11 @@
+from fastapi import Request,Response,HTTPException,status
 from sqlalchemy.ext.asyncio import create_async_engine,AsyncSession,async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from settings import ENVIRONMENT
+from .pool import InstrumentedPool
+from .replicas import Replica,ReplicaSet
+from .admission import AdmissionControl
+from .consistency import ReadYourWrites
 
 DB_ENGINE = ENVIRONMENT.DB_ENGINE
 
@@ -9,7 +14,9 @@ ENGINE = create_async_engine(
     url=f'{DB_ENGINE}+asyncpg://{ENVIRONMENT.DB_URL}',
     pool_size=ENVIRONMENT.SQLALCHEMY_POOL_SIZE,
     max_overflow=ENVIRONMENT.SQLALCHEMY_MAX_OVERFLOW,
-    pool_timeout=ENVIRONMENT.SQLALCHEMY_POOL_TIMEOUT
+    pool_timeout=ENVIRONMENT.SQLALCHEMY_POOL_TIMEOUT,
+    poolclass=InstrumentedPool,
+    pool_name='primary'
 )
 
 # create the database session manager
@@ -21,13 +28,84 @@ AsyncSessionLocal = async_sessionmaker(
     autocommit=False,
 )
 
+def _admission_control(pool_name:str) -> AdmissionControl:
+    # bounds the requests using a database at once to the connections of its pool
+    return AdmissionControl(
+        pool_name,
+        ENVIRONMENT.SQLALCHEMY_POOL_SIZE + ENVIRONMENT.SQLALCHEMY_MAX_OVERFLOW,
+        ENVIRONMENT.DB_ADMISSION_MAX_QUEUE,
+        ENVIRONMENT.DB_ADMISSION_WAIT_SECONDS
+    )
+
+DB_ADMISSION = _admission_control('primary')
+
+# read replicas of the database, each one with its own pool and admission control
+REPLICAS = ReplicaSet([
+    Replica(
+        f'replica-{index}',
+        create_async_engine(
+            url=f'{DB_ENGINE}+asyncpg://{url}',
+            pool_size=ENVIRONMENT.SQLALCHEMY_POOL_SIZE,
+            max_overflow=ENVIRONMENT.SQLALCHEMY_MAX_OVERFLOW,
+            pool_timeout=ENVIRONMENT.SQLALCHEMY_POOL_TIMEOUT,
+            poolclass=InstrumentedPool,
+            pool_name=f'replica-{index}'
+        ),
+        _admission_control(f'replica-{index}'),
+        ENVIRONMENT.REPLICA_MAX_LAG_SECONDS,
+        ENVIRONMENT.REPLICA_CHECK_INTERVAL_SECONDS
+    )
+    for index,url in enumerate(ENVIRONMENT.DB_REPLICA_URLS)
+])
+
 # create the base model for the models of database
 BaseModel = declarative_base()
 
-# dependency to get the database session
-async def get_database_session():
-    async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
\ No newline at end of file
+# methods that don't write, their requests can be served by a replica
+SAFE_METHODS = frozenset(('GET','HEAD','OPTIONS'))
+
+# clients that wrote recently, kept by user and by cookie
+READ_YOUR_WRITES = ReadYourWrites(
+    ENVIRONMENT.READ_YOUR_WRITES_SECONDS,
+    ENVIRONMENT.READ_YOUR_WRITES_MAX_USERS
+)
+
+def reads_from_primary(request:Request) -> bool:
+    '''
+    whether the client wrote recently, so it must see its own writes
+    '''
+    return READ_YOUR_WRITES.reads_from_primary(request)
+
+def _route(request:Request,response:Response) -> tuple[async_sessionmaker,AdmissionControl]:
+    # the reads are routed to a healthy replica and the writes to the primary
+    if not request.method in SAFE_METHODS:
+        if len(REPLICAS.replicas) > 0:
+            READ_YOUR_WRITES.wrote(request,response)
+        return AsyncSessionLocal,DB_ADMISSION
+    if reads_from_primary(request):
+        return AsyncSessionLocal,DB_ADMISSION
+    replica = REPLICAS.next()
+    if replica is None:
+        return AsyncSessionLocal,DB_ADMISSION
+    # the data read can be behind the primary, the response cache needs to know it
+    request.state.reads_replica = True
+    return replica.sessionmaker,replica.admission
+
+# dependency to get the database session, the requests are rejected with a '503'
+# when the database they are routed to is saturated instead of waiting for a connection
+async def get_database_session(request:Request,response:Response):
+    session_maker,admission = _route(request,response)
+    if not await admission.acquire():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='The service is overloaded, try again later',
+            headers={'Retry-After':str(ENVIRONMENT.DB_ADMISSION_RETRY_AFTER_SECONDS)}
+        )
+    try:
+        async with session_maker() as session:
+            try:
+                yield session
+            finally:
+                await session.close()
+    finally:
+        admission.release()
\ No newline at end of file
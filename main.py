@@ -1,5 +1,5 @@
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse,PlainTextResponse
 from scalar_fastapi.scalar_fastapi import get_scalar_api_reference,Layout
 from alembic.config import Config
 from alembic import command
@@ -7,12 +7,16 @@ import logging
 import os
 import asyncio
 
-from database import ENGINE,BaseModel
+from database import ENGINE,REPLICAS,DB_ADMISSION,READ_YOUR_WRITES,BaseModel,collect_pool_metrics,collect_admission_metrics
 from api.v1.user import user
 from api.v1.post import post
 from api.v1.comment import comment
 from api.v1.tag import tag
-from middlewares import TimeLoggerMiddleware
+from middlewares import TimingMiddleware,RateLimitMiddleware,RATE_LIMITER,instrument_engine
+from services import PASSWORD_HASHER
+from security import get_token_principal
+from cache import RESPONSE_CACHE,TOKEN_CLAIMS_CACHE,collect_token_versions
+from metrics import REGISTRY,CONTENT_TYPE
 from settings import ENVIRONMENT
 
 logging.basicConfig(level=logging.INFO)
@@ -43,14 +47,43 @@ async def startup():
 
 @app.on_event('shutdown')
 async def shutdown():
+    PASSWORD_HASHER.shutdown()
     await ENGINE.dispose()
+    await REPLICAS.dispose()
+    await RESPONSE_CACHE.close()
+    await RATE_LIMITER.close()
 
 app.include_router(user.router,prefix=ENVIRONMENT.GLOBAL_API_PREFIX)
 app.include_router(post.router,prefix=ENVIRONMENT.GLOBAL_API_PREFIX)
 app.include_router(comment.router,prefix=ENVIRONMENT.GLOBAL_API_PREFIX)
 app.include_router(tag.router,prefix=ENVIRONMENT.GLOBAL_API_PREFIX)
 
-app.add_middleware(TimeLoggerMiddleware)
+instrument_engine(ENGINE)
+for replica in REPLICAS.replicas:
+    instrument_engine(replica.engine)
+# the limits run inside the timing, so the rejected requests are measured too
+app.add_middleware(RateLimitMiddleware,limiter=RATE_LIMITER,principal=get_token_principal)
+app.add_middleware(TimingMiddleware)
+# the users read their own writes even if their clients don't keep cookies
+READ_YOUR_WRITES.use_principal(get_token_principal)
+
+REGISTRY.register(lambda:collect_pool_metrics(
+    [ENGINE,*[replica.engine for replica in REPLICAS.replicas]],
+    ENVIRONMENT.SQLALCHEMY_POOL_TIMEOUT
+))
+REGISTRY.register(PASSWORD_HASHER.collect)
+REGISTRY.register(REPLICAS.collect)
+REGISTRY.register(lambda:collect_admission_metrics(
+    [DB_ADMISSION,*[replica.admission for replica in REPLICAS.replicas]]
+))
+REGISTRY.register(RESPONSE_CACHE.collect)
+REGISTRY.register(TOKEN_CLAIMS_CACHE.collect)
+REGISTRY.register(collect_token_versions)
+REGISTRY.register(RATE_LIMITER.collect)
+
+@app.get("/metrics",include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(),media_type=CONTENT_TYPE)
 
 @app.get("/docs",include_in_schema=False)
 async def scalar_docs():
@@ -0,0 +1,28 @@
+from .histogram import Histogram,HistogramFamily,DEFAULT_BUCKETS
+from .gauge import Gauge
+from .exposition import Registry,CONTENT_TYPE,counter,gauge,histogram
+
+# latency in seconds of the http requests by method, route and status
+REQUEST_LATENCY = HistogramFamily(('method','route','status'))
+
+# http requests being served
+REQUESTS_IN_FLIGHT = Gauge()
+
+# metrics exposed by the application
+REGISTRY = Registry()
+
+def _collect_http_metrics() -> list[str]:
+    return [
+        *histogram(
+            'http_request_duration_seconds',
+            'Latency of the http requests',
+            REQUEST_LATENCY
+        ),
+        *gauge(
+            'http_requests_in_flight',
+            'Http requests being served',
+            [({},REQUESTS_IN_FLIGHT.value)]
+        )
+    ]
+
+REGISTRY.register(_collect_http_metrics)
@@ -0,0 +1,80 @@
+from typing import Callable,Iterable,Mapping
+from .histogram import Histogram,HistogramFamily
+
+Collector = Callable[[],Iterable[str]]
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _format_labels(labels:Mapping[str,str]) -> str:
+    if len(labels) == 0:
+        return ''
+    values = ','.join(
+        '{}="{}"'.format(name,str(value).replace('\\','\\\\').replace('"','\\"').replace('\n','\\n'))
+        for name,value in labels.items()
+    )
+    return '{' + values + '}'
+
+def _format_value(value:float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value,float) else str(value)
+
+def gauge(name:str,help:str,samples:Iterable[tuple[Mapping[str,str],float]]) -> list[str]:
+    '''
+    lines of a gauge metric with a sample for each set of labels
+    '''
+    lines = [f'# HELP {name} {help}',f'# TYPE {name} gauge']
+    lines.extend(f'{name}{_format_labels(labels)} {_format_value(value)}' for labels,value in samples)
+    return lines
+
+def counter(name:str,help:str,samples:Iterable[tuple[Mapping[str,str],float]]) -> list[str]:
+    '''
+    lines of a counter metric with a sample for each set of labels
+    '''
+    lines = [f'# HELP {name} {help}',f'# TYPE {name} counter']
+    lines.extend(f'{name}{_format_labels(labels)} {_format_value(value)}' for labels,value in samples)
+    return lines
+
+def histogram(name:str,help:str,histograms:HistogramFamily | Histogram) -> list[str]:
+    '''
+    lines of a histogram metric, labeled if a family is given
+    '''
+    lines = [f'# HELP {name} {help}',f'# TYPE {name} histogram']
+    if isinstance(histograms,Histogram):
+        items = [({},histograms)]
+    else:
+        items = [
+            (dict(zip(histograms.label_names,values)),item)
+            for values,item in histograms.items()
+        ]
+    for labels,item in items:
+        snapshot = item.snapshot()
+        for bound,count in snapshot['buckets']:
+            bucket_labels = {**labels,'le':_format_value(bound)}
+            lines.append(f'{name}_bucket{_format_labels(bucket_labels)} {count}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(snapshot["sum"])}')
+        lines.append(f'{name}_count{_format_labels(labels)} {snapshot["count"]}')
+    return lines
+
+class Registry:
+
+    def __init__(self):
+        '''
+        set of collectors rendered together in the prometheus text format
+        '''
+        self._collectors:list[Collector] = []
+
+    def register(self,collector:Collector) -> None:
+        '''
+        adds a collector, a function that returns the lines of its metrics
+        '''
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        '''
+        current value of all the metrics in the prometheus text format
+        '''
+        lines = []
+        for collector in self._collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,20 @@
+class Gauge:
+
+    def __init__(self):
+        '''
+        in-process value that goes up and down
+        '''
+        self._value = 0.0
+
+    def inc(self,amount:float=1) -> None:
+        self._value += amount
+
+    def dec(self,amount:float=1) -> None:
+        self._value -= amount
+
+    def set(self,value:float) -> None:
+        self._value = value
+
+    @property
+    def value(self) -> float:
+        return self._value
@@ -0,0 +1,70 @@
+from typing import Sequence
+from bisect import bisect_left
+
+# latency buckets in seconds
+DEFAULT_BUCKETS = (0.005,0.01,0.025,0.05,0.1,0.25,0.5,1.0,2.5,5.0,10.0)
+
+class Histogram:
+
+    def __init__(self,buckets:Sequence[float]=DEFAULT_BUCKETS):
+        '''
+        in-process histogram of observed values with fixed upper bounds
+
+        params:
+            buckets -> sorted upper bounds of the buckets, an extra '+Inf'
+                bucket is always added
+        '''
+        self._buckets = tuple(buckets)
+        self._counts = [0 for _ in range(len(self._buckets) + 1)]
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self,value:float) -> None:
+        '''
+        adds a value to the histogram
+        '''
+        self._counts[bisect_left(self._buckets,value)] += 1
+        self._sum += value
+        self._count += 1
+
+    def snapshot(self) -> dict:
+        '''
+        cumulative count of each bucket ('le' upper bound), sum and count of
+        the observed values
+        '''
+        cumulative = []
+        total = 0
+        for bound,count in zip((*self._buckets,float('inf')),self._counts):
+            total += count
+            cumulative.append((bound,total))
+        return {
+            'buckets':cumulative,
+            'sum':self._sum,
+            'count':self._count
+        }
+
+class HistogramFamily:
+
+    def __init__(self,label_names:Sequence[str],buckets:Sequence[float]=DEFAULT_BUCKETS):
+        '''
+        set of histograms with the same buckets, one for each combination of
+        values of its labels
+        '''
+        self.label_names = tuple(label_names)
+        self._buckets = tuple(buckets)
+        self._histograms:dict[tuple[str,...],Histogram] = {}
+
+    def labels(self,*values:str) -> Histogram:
+        '''
+        gets the histogram of the given label values
+        '''
+        histogram = self._histograms.get(values)
+        if histogram is None:
+            histogram = self._histograms[values] = Histogram(self._buckets)
+        return histogram
+
+    def items(self) -> list[tuple[tuple[str,...],Histogram]]:
+        '''
+        label values and histogram of each combination observed
+        '''
+        return list(self._histograms.items())
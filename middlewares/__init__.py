@@ -1 +1,30 @@
-from .time_logger import TimeLoggerMiddleware
\ No newline at end of file
+from settings import ENVIRONMENT
+from cache import RedisClient
+from .timing import (
+    TimingMiddleware,
+    TimedRoute,
+    RequestTimings,
+    REQUEST_TIMINGS,
+    timed_phase,
+    instrument_engine
+)
+from .rate_limit import (
+    RateLimitMiddleware,
+    RateLimiter,
+    RateLimit,
+    RateLimitRule,
+    TokenBuckets,
+    parse_rate_limit,
+    parse_rate_limit_rule
+)
+
+RATE_LIMITER = RateLimiter(
+    [parse_rate_limit_rule(rule) for rule in ENVIRONMENT.RATE_LIMITS],
+    parse_rate_limit(ENVIRONMENT.RATE_LIMIT_DEFAULT) if ENVIRONMENT.RATE_LIMIT_DEFAULT else None,
+    TokenBuckets(ENVIRONMENT.RATE_LIMIT_SHARDS,ENVIRONMENT.RATE_LIMIT_MAX_KEYS),
+    RedisClient(
+        ENVIRONMENT.RATE_LIMIT_REDIS_URL,
+        pool_size=ENVIRONMENT.REDIS_POOL_SIZE,
+        cooldown=ENVIRONMENT.REDIS_COOLDOWN_SECONDS
+    ) if ENVIRONMENT.RATE_LIMIT_REDIS_URL else None
+)
\ No newline at end of file
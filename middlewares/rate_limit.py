@@ -0,0 +1,282 @@
+from typing import Callable,NamedTuple
+from collections import OrderedDict
+from math import ceil
+from time import monotonic
+from hashlib import sha1
+import asyncio
+import logging
+import re
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.routing import compile_path
+from starlette.types import ASGIApp,Receive,Scope,Send
+from cache import RedisClient,RedisError,RedisUnavailable
+from metrics import counter,gauge
+
+logger = logging.getLogger(__name__)
+
+# errors of the shared backend, the limits are kept in-process meanwhile
+SHARED_ERRORS = (OSError,RedisError,asyncio.TimeoutError)
+
+# takes a token from a bucket stored as a hash, refilled with the time of the
+# server so all the workers share the same clock, returns if the token was
+# taken and the seconds to wait for the next one
+TAKE_SCRIPT = '''
+if redis.replicate_commands then redis.replicate_commands() end
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - updated, 0) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(wait)
+'''
+
+# the server keeps the scripts by its sha1, so only the hash is sent per call
+TAKE_SCRIPT_SHA = sha1(TAKE_SCRIPT.encode()).hexdigest()
+
+class RateLimit(NamedTuple):
+    requests:int
+    seconds:float
+
+    @property
+    def rate(self) -> float:
+        '''
+        tokens refilled by second
+        '''
+        return self.requests / self.seconds
+
+class RateLimitRule(NamedTuple):
+    name:str
+    method:str | None
+    pattern:re.Pattern
+    limit:RateLimit
+
+def parse_rate_limit(value:str) -> RateLimit:
+    '''
+    parses a limit in the form 'REQUESTS/SECONDS', the requests are also the
+    max burst allowed
+    '''
+    requests,seconds = value.split('/')
+    limit = RateLimit(int(requests),float(seconds))
+    if limit.requests <= 0 or limit.seconds <= 0:
+        raise ValueError(f'invalid rate limit "{value}"')
+    return limit
+
+def parse_rate_limit_rule(rule:str) -> RateLimitRule:
+    '''
+    parses a rule in the form '[METHOD ]PATH=REQUESTS/SECONDS', the path is the
+    path of a route with its parameters, like '/api/v1/posts/{post_id}'
+    '''
+    name,limit = rule.rsplit('=',1)
+    name = name.strip()
+    method,_,path = name.rpartition(' ')
+    pattern,_,_ = compile_path(path.strip())
+    return RateLimitRule(name,method.strip().upper() or None,pattern,parse_rate_limit(limit.strip()))
+
+class TokenBuckets:
+
+    def __init__(self,shards:int,max_keys:int):
+        '''
+        in-process token buckets split in shards by key, each shard is bounded
+        and forgets its least recently used buckets, a forgotten bucket starts
+        full again
+
+        a bucket is read and written without awaiting in between, so the event
+        loop never interleaves two takes and no lock is needed
+
+        params:
+            shards:int -> number of shards
+            max_keys:int -> max number of buckets among all the shards
+        '''
+        self._shards:list[OrderedDict[str,list[float]]] = [OrderedDict() for _ in range(max(shards,1))]
+        self._max_keys = max(max_keys // len(self._shards),1)
+
+    def take(self,key:str,limit:RateLimit) -> float:
+        '''
+        takes a token from the bucket of the key, returns 0 if it was taken
+        or the seconds to wait for the next token
+        '''
+        shard = self._shards[hash(key) % len(self._shards)]
+        now = monotonic()
+        bucket = shard.get(key)
+        if bucket is None:
+            bucket = [float(limit.requests),now]
+            shard[key] = bucket
+            while len(shard) > self._max_keys:
+                shard.popitem(last=False)
+        else:
+            shard.move_to_end(key)
+            bucket[0] = min(float(limit.requests),bucket[0] + (now - bucket[1])*limit.rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / limit.rate
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+class RateLimiter:
+
+    def __init__(
+        self,
+        rules:list[RateLimitRule],
+        default:RateLimit | None,
+        buckets:TokenBuckets,
+        shared:RedisClient | None=None
+    ):
+        '''
+        token bucket limits by route and caller, the first rule matching the
+        method and the path of a request gives its limit, the default limit
+        applies to the requests matching no rule
+
+        params:
+            rules:list[RateLimitRule] -> limits of the routes
+            default:RateLimit -> limit of the other requests, None to not limit them
+            buckets:TokenBuckets -> in-process state of the limits
+            shared:RedisClient -> shared backend to keep the limits among all
+                the workers, None to keep them in-process, the limits are kept
+                in-process too while it fails
+        '''
+        self._rules = rules
+        self._default = default
+        self._buckets = buckets
+        self._shared = shared
+        self._allowed = 0
+        self._rejected:dict[str,int] = {}
+        self._shared_errors = 0
+        self._shared_skipped = 0
+
+    def _match(self,method:str,path:str) -> tuple[str,RateLimit | None]:
+        for rule in self._rules:
+            if (rule.method is None or rule.method == method) and rule.pattern.match(path):
+                return rule.name,rule.limit
+        return 'default',self._default
+
+    async def _take_shared(self,key:str,limit:RateLimit) -> float:
+        args = (1,f'rate-limit:{key}',limit.requests,limit.rate)
+        try:
+            return float(await self._shared.execute('EVALSHA',TAKE_SCRIPT_SHA,*args)) # type: ignore
+        except RedisError as e:
+            if not str(e).startswith('NOSCRIPT'):
+                raise
+        # the server lost the script, like after a restart, it's loaded again
+        _,wait = await self._shared.pipeline(('SCRIPT','LOAD',TAKE_SCRIPT),('EVALSHA',TAKE_SCRIPT_SHA,*args)) # type: ignore
+        return float(wait)
+
+    async def _take(self,key:str,limit:RateLimit) -> float:
+        if not self._shared is None:
+            try:
+                return await self._take_shared(key,limit)
+            except RedisUnavailable:
+                # the backend is cooling down after a failure already logged
+                self._shared_skipped += 1
+            except SHARED_ERRORS as e:
+                self._shared_errors += 1
+                logger.warning('shared rate limit backend unavailable: %s',e)
+        return self._buckets.take(key,limit)
+
+    async def check(self,method:str,path:str,caller:str) -> float:
+        '''
+        takes a token for a request of the caller, returns 0 if the request is
+        allowed or the seconds to wait before retrying it
+        '''
+        name,limit = self._match(method,path)
+        if limit is None:
+            return 0.0
+        wait = await self._take(f'{name}|{caller}',limit)
+        if wait > 0:
+            self._rejected[name] = self._rejected.get(name,0) + 1
+        else:
+            self._allowed += 1
+        return wait
+
+    async def close(self) -> None:
+        '''
+        closes the connections to the shared backend
+        '''
+        if not self._shared is None:
+            await self._shared.close()
+
+    def collect(self) -> list[str]:
+        '''
+        lines of the metrics of the limits
+        '''
+        return [
+            *counter('rate_limit_allowed_total','Requests allowed by the rate limits',[({},self._allowed)]),
+            *counter(
+                'rate_limit_rejected_total',
+                'Requests rejected by the rate limits',
+                [({'rule':name},value) for name,value in self._rejected.items()]
+            ),
+            *gauge('rate_limit_buckets','Token buckets kept in-process',[({},len(self._buckets))]),
+            *counter(
+                'rate_limit_shared_errors_total',
+                'Failed operations in the shared backend',
+                [({},self._shared_errors)]
+            ),
+            *counter(
+                'rate_limit_shared_skipped_total',
+                'Requests limited in-process while the shared backend cooled down after a failure',
+                [({},self._shared_skipped)]
+            )
+        ]
+
+class RateLimitMiddleware:
+
+    def __init__(
+        self,
+        app:ASGIApp,
+        limiter:RateLimiter,
+        principal:Callable[[str],str | None] | None=None
+    ):
+        '''
+        pure ASGI middleware that rejects the requests over its rate limit with
+        a '429' before they reach the routes, so no database or password work
+        is done for them
+
+        params:
+            limiter:RateLimiter -> limits of the requests
+            principal:Callable -> gets the id of the user of a bearer token, None
+                if the token isn't valid, the requests without a valid token are
+                limited by client address
+        '''
+        self.app = app
+        self._limiter = limiter
+        self._principal = principal
+
+    def _caller(self,scope:Scope) -> str:
+        if not self._principal is None:
+            scheme,_,token = Headers(scope=scope).get('authorization','').partition(' ')
+            if scheme.lower() == 'bearer' and token:
+                user_id = self._principal(token)
+                if not user_id is None:
+                    return f'user:{user_id}'
+        client = scope.get('client')
+        return f'ip:{client[0] if client else "unknown"}'
+
+    async def __call__(self,scope:Scope,receive:Receive,send:Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope,receive,send)
+            return
+        wait = await self._limiter.check(scope['method'],scope['path'],self._caller(scope))
+        if wait > 0:
+            response = JSONResponse(
+                {'detail':'Too many requests'},
+                status_code=429,
+                headers={'Retry-After':str(max(ceil(wait),1))}
+            )
+            await response(scope,receive,send)
+            return
+        await self.app(scope,receive,send)
@@ -0,0 +1,215 @@
+from typing import Any,Callable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter_ns
+import functools
+import inspect
+import logging
+import re
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp,Message,Receive,Scope,Send
+from metrics import REQUEST_LATENCY,REQUESTS_IN_FLIGHT
+from settings import ENVIRONMENT
+
+logger = logging.getLogger(__name__)
+
+# lists of bound parameters, like the ones of the expanded 'IN' clauses
+_PARAMETERS_LIST = re.compile(r'\$\d+(?:\s*,\s*\$\d+)*')
+
+def _statement_shape(statement:str) -> str:
+    # the statement with its lists of parameters collapsed, so the same query
+    # with a different number of parameters has the same shape
+    return _PARAMETERS_LIST.sub('?',statement)
+
+class RequestTimings:
+
+    def __init__(self):
+        '''
+        durations of the phases of a request, in nanoseconds
+
+        the phases don't overlap, the time of a phase measured inside another
+        one (like the 'db' time of the 'auth' phase) only counts in the inner
+        phase, so the phases add up to at most the 'app' time
+        '''
+        self.start = perf_counter_ns()
+        self.phases:dict[str,int] = {}
+        # total time of the phases, to exclude the nested ones
+        self.accounted = 0
+        self.handler_end:int | None = None
+        self.queries = 0
+        self.statements:dict[str,int] = {}
+
+    def add(self,phase:str,duration:int) -> None:
+        '''
+        adds a duration to a phase
+        '''
+        self.phases[phase] = self.phases.get(phase,0) + duration
+        self.accounted += duration
+
+    def add_query(self,statement:str,duration:int) -> None:
+        '''
+        accounts a statement executed in the database
+        '''
+        self.add('db',duration)
+        self.queries += 1
+        shape = _statement_shape(statement)
+        self.statements[shape] = self.statements.get(shape,0) + 1
+
+    def repeated_statements(self,threshold:int) -> list[tuple[str,int]]:
+        '''
+        statements executed more than 'threshold' times, a sign of N+1 queries
+        '''
+        return [
+            (statement,count)
+            for statement,count in self.statements.items()
+            if count > threshold
+        ]
+
+    def server_timing(self,now:int) -> str:
+        '''
+        value of the 'Server-Timing' header at the given instant
+        '''
+        phases = dict(self.phases)
+        if not self.handler_end is None:
+            phases['serialize'] = phases.get('serialize',0) + now - self.handler_end
+        phases['app'] = now - self.start
+        return ', '.join(
+            f'{phase};dur={duration / 1_000_000:.3f}'
+            for phase,duration in phases.items()
+        )
+
+REQUEST_TIMINGS:ContextVar[RequestTimings | None] = ContextVar('request_timings',default=None)
+
+@contextmanager
+def timed_phase(phase:str):
+    '''
+    measures the enclosed block as a phase of the current request, without
+    the time of the phases nested in it
+    '''
+    timings = REQUEST_TIMINGS.get()
+    if timings is None:
+        yield
+        return
+    start = perf_counter_ns()
+    accounted = timings.accounted
+    try:
+        yield
+    finally:
+        nested = timings.accounted - accounted
+        timings.add(phase,perf_counter_ns() - start - nested)
+
+def instrument_engine(engine:AsyncEngine) -> None:
+    '''
+    accounts the statements executed by the requests and the time spent in
+    the database, reported as its 'db' phase
+    '''
+    @event.listens_for(engine.sync_engine,'before_cursor_execute')
+    def before_cursor_execute(conn,cursor,statement,parameters,context,executemany):
+        conn.info.setdefault('query_start',[]).append(perf_counter_ns())
+
+    @event.listens_for(engine.sync_engine,'after_cursor_execute')
+    def after_cursor_execute(conn,cursor,statement,parameters,context,executemany):
+        start = conn.info['query_start'].pop()
+        timings = REQUEST_TIMINGS.get()
+        if not timings is None:
+            timings.add_query(statement,perf_counter_ns() - start)
+
+    @event.listens_for(engine.sync_engine,'handle_error')
+    def handle_error(context):
+        if not context.connection is None and context.connection.info.get('query_start'):
+            context.connection.info['query_start'].pop()
+
+def _timed_endpoint(endpoint:Callable[...,Any]) -> Callable[...,Any]:
+    if not inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def timed_endpoint(*args,**kwargs):
+        try:
+            return await endpoint(*args,**kwargs)
+        finally:
+            timings = REQUEST_TIMINGS.get()
+            if not timings is None:
+                timings.handler_end = perf_counter_ns()
+    return timed_endpoint
+
+class TimedRoute(APIRoute):
+
+    def __init__(self,path:str,endpoint:Callable[...,Any],**kwargs):
+        '''
+        route that marks when its endpoint returns, so the time spent after it
+        validating and serializing the response is reported as 'serialize'
+        '''
+        super().__init__(path,_timed_endpoint(endpoint),**kwargs)
+
+def _route_path(scope:Scope) -> str:
+    # path template of the matched route, so the paths with parameters are
+    # grouped and unmatched paths don't create new labels
+    route = scope.get('route')
+    if not route is None:
+        return route.path
+    if 'endpoint' in scope:
+        return scope['path']
+    return '<unmatched>'
+
+class TimingMiddleware:
+
+    def __init__(self,app:ASGIApp):
+        '''
+        pure ASGI middleware that measures the requests, reports its phases in
+        the 'Server-Timing' header and records its latency
+        '''
+        self.app = app
+
+    async def __call__(self,scope:Scope,receive:Receive,send:Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope,receive,send)
+            return
+
+        timings = RequestTimings()
+        token = REQUEST_TIMINGS.set(timings)
+        recorded = False
+        status_code = 500
+        REQUESTS_IN_FLIGHT.inc()
+
+        def record() -> None:
+            nonlocal recorded
+            recorded = True
+            REQUESTS_IN_FLIGHT.dec()
+            duration = perf_counter_ns() - timings.start
+            REQUEST_LATENCY.labels(
+                scope['method'],
+                _route_path(scope),
+                str(status_code)
+            ).observe(duration / 1_000_000_000)
+            logger.debug('request %s %s resolved in %.3fms',scope['method'],scope['path'],duration / 1_000_000)
+            for statement,count in timings.repeated_statements(ENVIRONMENT.REPEATED_QUERY_THRESHOLD):
+                logger.warning(
+                    'request %s %s executed %d times the statement: %s',
+                    scope['method'],
+                    scope['path'],
+                    count,
+                    statement
+                )
+
+        async def send_with_timings(message:Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                headers = MutableHeaders(scope=message)
+                headers.append('Server-Timing',timings.server_timing(perf_counter_ns()))
+                headers.append('X-DB-Queries',str(timings.queries))
+                headers.append('X-DB-Time',f'{timings.phases.get("db",0) / 1_000_000:.3f}')
+            elif message['type'] == 'http.response.body' and not message.get('more_body',False):
+                record()
+            await send(message)
+
+        try:
+            await self.app(scope,receive,send_with_timings)
+        finally:
+            REQUEST_TIMINGS.reset(token)
+            if not recorded:
+                record()
@@ -0,0 +1,34 @@
+"""adds (created_at, id) listing indexes
+
+Revision ID: 3c1f8e2a9b47
+Revises: 5aa952c3df3a
+Create Date: 2026-10-18 09:12:40.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f8e2a9b47'
+down_revision: Union[str, Sequence[str], None] = '5aa952c3df3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+    op.create_index('ix_posts_created_at_id', 'posts', ['created_at', 'id'], unique=False)
+    op.create_index('ix_comments_created_at_id', 'comments', ['created_at', 'id'], unique=False)
+    op.create_index('ix_tags_created_at_id', 'tags', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tags_created_at_id', table_name='tags')
+    op.drop_index('ix_comments_created_at_id', table_name='comments')
+    op.drop_index('ix_posts_created_at_id', table_name='posts')
+    op.drop_index('ix_users_created_at_id', table_name='users')
@@ -0,0 +1,28 @@
+"""adds comments (post_id, created_at) index
+
+Revision ID: 7b2d4f6a1c58
+Revises: 3c1f8e2a9b47
+Create Date: 2026-10-18 10:04:11.527893
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2d4f6a1c58'
+down_revision: Union[str, Sequence[str], None] = '3c1f8e2a9b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_comments_post_id_created_at', 'comments', ['post_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_comments_post_id_created_at', table_name='comments')
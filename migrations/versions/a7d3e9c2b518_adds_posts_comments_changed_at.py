@@ -0,0 +1,34 @@
+"""adds the instant of the last change of the comments to posts
+
+Revision ID: a7d3e9c2b518
+Revises: f3b9d2c8a614
+Create Date: 2026-10-18 17:24:05.912338
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e9c2b518'
+down_revision: Union[str, Sequence[str], None] = 'f3b9d2c8a614'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('comments_changed_at', sa.DateTime(timezone=True), nullable=True))
+    # the existing posts take the last change of its comments
+    op.execute(
+        'UPDATE posts SET comments_changed_at = ('
+        'SELECT max(greatest(comments.updated_at, comments.deleted_at)) FROM comments '
+        'WHERE comments.post_id = posts.id)'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('posts', 'comments_changed_at')
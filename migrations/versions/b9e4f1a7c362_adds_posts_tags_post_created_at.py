@@ -0,0 +1,38 @@
+"""adds the creation instant of the post to posts_tags
+
+Revision ID: b9e4f1a7c362
+Revises: a7d3e9c2b518
+Create Date: 2026-10-18 18:02:41.530917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9e4f1a7c362'
+down_revision: Union[str, Sequence[str], None] = 'a7d3e9c2b518'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts_tags', sa.Column('post_created_at', sa.DateTime(timezone=True), nullable=True))
+    # the existing links take the creation instant of its post
+    op.execute(
+        'UPDATE posts_tags SET post_created_at = posts.created_at FROM posts '
+        'WHERE posts.id = posts_tags.post_id'
+    )
+    op.alter_column('posts_tags', 'post_created_at',
+               existing_type=sa.DateTime(timezone=True),
+               nullable=False)
+    op.create_index('ix_posts_tags_tag_id_post_created_at_post_id', 'posts_tags', ['tag_id', 'post_created_at', 'post_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_tags_tag_id_post_created_at_post_id', table_name='posts_tags')
+    op.drop_column('posts_tags', 'post_created_at')
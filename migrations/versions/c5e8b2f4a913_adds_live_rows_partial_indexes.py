@@ -0,0 +1,42 @@
+"""adds partial indexes of the live rows
+
+Revision ID: c5e8b2f4a913
+Revises: 9e4a1d3c7f20
+Create Date: 2026-10-18 12:41:09.318245
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e8b2f4a913'
+down_revision: Union[str, Sequence[str], None] = '9e4a1d3c7f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# index name, table and columns of the partial indexes
+INDEXES = (
+    ('ix_users_username_live', 'users', ['username']),
+    ('ix_users_email_live', 'users', ['email']),
+    ('ix_posts_title_live', 'posts', ['title']),
+    ('ix_tags_name_live', 'tags', ['name']),
+    ('ix_users_created_at_id_live', 'users', ['created_at', 'id']),
+    ('ix_posts_created_at_id_live', 'posts', ['created_at', 'id']),
+    ('ix_comments_created_at_id_live', 'comments', ['created_at', 'id']),
+    ('ix_tags_created_at_id_live', 'tags', ['created_at', 'id']),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, postgresql_where=sa.text('is_deleted = false'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
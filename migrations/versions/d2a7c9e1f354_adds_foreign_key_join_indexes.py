@@ -0,0 +1,33 @@
+"""adds foreign key and join path indexes
+
+Revision ID: d2a7c9e1f354
+Revises: c5e8b2f4a913
+Create Date: 2026-10-18 13:02:47.661930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a7c9e1f354'
+down_revision: Union[str, Sequence[str], None] = 'c5e8b2f4a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # comments (post_id, created_at) already exists since 7b2d4f6a1c58, the
+    # tag-first path of posts_tags is indexed by b9e4f1a7c362 along with the
+    # creation instant of the posts, so the posts of a tag are paged from it
+    op.create_index('ix_comments_author_id', 'comments', ['author_id'], unique=False)
+    op.create_index('ix_posts_author_id_created_at', 'posts', ['author_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_author_id_created_at', table_name='posts')
+    op.drop_index('ix_comments_author_id', table_name='comments')
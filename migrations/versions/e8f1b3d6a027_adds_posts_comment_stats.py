@@ -0,0 +1,54 @@
+"""adds comment count and last comment instant to posts
+
+Revision ID: e8f1b3d6a027
+Revises: d2a7c9e1f354
+Create Date: 2026-10-18 13:37:52.184406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8f1b3d6a027'
+down_revision: Union[str, Sequence[str], None] = 'd2a7c9e1f354'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('posts', sa.Column('last_comment_at', sa.DateTime(timezone=True), nullable=True))
+    # the existing posts take the values of its live comments
+    op.execute(
+        'UPDATE posts SET '
+        'comment_count = (SELECT count(comments.id) FROM comments '
+        'WHERE comments.post_id = posts.id AND comments.is_deleted = false), '
+        'last_comment_at = (SELECT max(comments.created_at) FROM comments '
+        'WHERE comments.post_id = posts.id AND comments.is_deleted = false)'
+    )
+    op.create_index(
+        'ix_posts_comment_count_id_live',
+        'posts',
+        ['comment_count', 'id'],
+        unique=False,
+        postgresql_where=sa.text('is_deleted = false')
+    )
+    op.create_index(
+        'ix_posts_last_activity_id_live',
+        'posts',
+        [sa.text('coalesce(last_comment_at, created_at)'), 'id'],
+        unique=False,
+        postgresql_where=sa.text('is_deleted = false')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_last_activity_id_live', table_name='posts')
+    op.drop_index('ix_posts_comment_count_id_live', table_name='posts')
+    op.drop_column('posts', 'last_comment_at')
+    op.drop_column('posts', 'comment_count')
@@ -0,0 +1,28 @@
+"""adds token version to users
+
+Revision ID: f3b9d2c8a614
+Revises: e8f1b3d6a027
+Create Date: 2026-10-18 15:02:11.640273
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b9d2c8a614'
+down_revision: Union[str, Sequence[str], None] = 'e8f1b3d6a027'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
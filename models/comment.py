@@ -1,14 +1,20 @@
-from sqlalchemy import String,ForeignKey
+from sqlalchemy import String,ForeignKey,Index
 from sqlalchemy.orm import Mapped,mapped_column,relationship
 from uuid import uuid4
 from database import BaseModel
-from .mixins import TimestampMixin,SoftDeleteMixin
+from .mixins import TimestampMixin,SoftDeleteMixin,LIVE_ROWS
 
 class Comment(BaseModel,TimestampMixin,SoftDeleteMixin):
     '''
     comment entity
     '''
     __tablename__ = 'comments'
+    __table_args__ = (
+        Index('ix_comments_created_at_id','created_at','id'),
+        Index('ix_comments_created_at_id_live','created_at','id',postgresql_where=LIVE_ROWS),
+        Index('ix_comments_post_id_created_at','post_id','created_at'),
+        Index('ix_comments_author_id','author_id'),
+    )
 
     id:Mapped[str] = mapped_column(String,primary_key=True,default=lambda:str(uuid4()))
     content:Mapped[str] = mapped_column(String(255),nullable=False)
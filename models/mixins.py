@@ -1,10 +1,13 @@
-from sqlalchemy import Column,DateTime,Boolean,func
+from sqlalchemy import Column,DateTime,Boolean,func,text
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.sql import expression
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.types import DateTime
 from datetime import datetime,timezone
 
+# predicate of the rows not soft deleted, the partial indexes cover only them
+LIVE_ROWS = text('is_deleted = false')
+
 class utcnow(expression.FunctionElement):
     type = DateTime()
     inherit_cache = True
@@ -1,14 +1,24 @@
-from sqlalchemy import Column, String,ForeignKey,Table
+from sqlalchemy import Column, String,Integer,DateTime,ForeignKey,Table,Index,Computed,text
 from sqlalchemy.orm import Mapped,mapped_column,relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from uuid import uuid4
+from datetime import datetime
 from database import BaseModel
-from .mixins import TimestampMixin,SoftDeleteMixin
+from .mixins import TimestampMixin,SoftDeleteMixin,LIVE_ROWS
+
+# text search configuration of the posts search vector
+SEARCH_CONFIGURATION = 'english'
 
 posts_tags = Table(
     'posts_tags',
     BaseModel.metadata,
     Column('post_id',String,ForeignKey('posts.id',ondelete='CASCADE'),primary_key=True),
-    Column('tag_id',String,ForeignKey('tags.id',ondelete='CASCADE'),primary_key=True)
+    Column('tag_id',String,ForeignKey('tags.id',ondelete='CASCADE'),primary_key=True),
+    # creation instant of the post, which never changes, so the posts of a tag
+    # are paginated in order of creation through the index below
+    Column('post_created_at',DateTime(timezone=True),nullable=False),
+    # the primary key starts by the post, the posts of a tag are found by this one
+    Index('ix_posts_tags_tag_id_post_created_at_post_id','tag_id','post_created_at','post_id')
 )
 
 class Post(BaseModel,TimestampMixin,SoftDeleteMixin):
@@ -17,14 +27,45 @@ class Post(BaseModel,TimestampMixin,SoftDeleteMixin):
     '''
 
     __tablename__ = 'posts'
+    __table_args__ = (
+        Index('ix_posts_created_at_id','created_at','id'),
+        Index('ix_posts_created_at_id_live','created_at','id',postgresql_where=LIVE_ROWS),
+        Index('ix_posts_title_live','title',postgresql_where=LIVE_ROWS),
+        Index('ix_posts_author_id_created_at','author_id','created_at'),
+        Index('ix_posts_comment_count_id_live','comment_count','id',postgresql_where=LIVE_ROWS),
+        Index(
+            'ix_posts_last_activity_id_live',
+            text('coalesce(last_comment_at, created_at)'),
+            'id',
+            postgresql_where=LIVE_ROWS
+        ),
+        Index('ix_posts_search_vector','search_vector',postgresql_using='gin'),
+    )
 
     id:Mapped[str] = mapped_column(String,primary_key=True,default=lambda:str(uuid4()))
     title:Mapped[str] = mapped_column(String,unique=True,nullable=False,index=True)
     content:Mapped[str] = mapped_column(String,nullable=False)
     author_id:Mapped[str] = mapped_column(String,ForeignKey('users.id',ondelete='CASCADE'),nullable=False)
+    # weighted full-text vector of the title and content, maintained by the database
+    search_vector:Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIGURATION}', coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIGURATION}', coalesce(content, '')), 'B')",
+            persisted=True
+        ),
+        deferred=True
+    )
+
+    # live comments of the post, maintained by 'CommentRepository'
+    comment_count:Mapped[int] = mapped_column(Integer,nullable=False,default=0,server_default='0')
+    last_comment_at:Mapped[datetime | None] = mapped_column(DateTime(timezone=True),nullable=True)
+    # last change of any comment of the post, part of the version of the post
+    comments_changed_at:Mapped[datetime | None] = mapped_column(DateTime(timezone=True),nullable=True)
 
     author = relationship('User',back_populates='posts',lazy='selectin')
 
-    comments = relationship('Comment',back_populates='post',cascade='all, delete-orphan',lazy='selectin')
+    # comments are never loaded with the post, they are paginated from 'CommentRepository'
+    comments = relationship('Comment',back_populates='post',cascade='all, delete-orphan',lazy='noload')
 
     tags = relationship('Tag',back_populates='posts',secondary=posts_tags,lazy='selectin')
\ No newline at end of file
@@ -1,12 +1,17 @@
-from sqlalchemy import ForeignKey,String
+from sqlalchemy import ForeignKey,String,Index
 from sqlalchemy.orm import Mapped,mapped_column,relationship
 from uuid import uuid4
 from database import BaseModel
-from .mixins import TimestampMixin,SoftDeleteMixin
+from .mixins import TimestampMixin,SoftDeleteMixin,LIVE_ROWS
 
 class Tag(BaseModel,TimestampMixin,SoftDeleteMixin):
 
     __tablename__ = 'tags'
+    __table_args__ = (
+        Index('ix_tags_created_at_id','created_at','id'),
+        Index('ix_tags_created_at_id_live','created_at','id',postgresql_where=LIVE_ROWS),
+        Index('ix_tags_name_live','name',postgresql_where=LIVE_ROWS),
+    )
 
     id:Mapped[str] = mapped_column(String,primary_key=True,default=lambda:str(uuid4()))
     name:Mapped[str] = mapped_column(String,unique=True,index=True,nullable=False)
@@ -1,19 +1,27 @@
-from sqlalchemy import String
+from sqlalchemy import String,Integer,Index
 from sqlalchemy.orm import Mapped,mapped_column,relationship
 from uuid import uuid4
 from database import BaseModel
-from .mixins import TimestampMixin,SoftDeleteMixin
+from .mixins import TimestampMixin,SoftDeleteMixin,LIVE_ROWS
 
 class User(BaseModel,TimestampMixin,SoftDeleteMixin):
     '''
     Represents an 'user' entity in the database
     '''
     __tablename__ = 'users'
+    __table_args__ = (
+        Index('ix_users_created_at_id','created_at','id'),
+        Index('ix_users_created_at_id_live','created_at','id',postgresql_where=LIVE_ROWS),
+        Index('ix_users_username_live','username',postgresql_where=LIVE_ROWS),
+        Index('ix_users_email_live','email',postgresql_where=LIVE_ROWS),
+    )
 
     id:Mapped[str] = mapped_column(String,primary_key=True,default=lambda:str(uuid4()))
     username:Mapped[str] = mapped_column(String,unique=True,nullable=False,index=True)
     email:Mapped[str] = mapped_column(String,unique=True,index=True,nullable=False)
     hashed_password:Mapped[str] = mapped_column(String,nullable=False)
+    # bumped to revoke all the issued tokens of the user
+    token_version:Mapped[int] = mapped_column(Integer,nullable=False,default=0,server_default='0')
 
     posts = relationship('Post',back_populates='author',cascade='all, delete-orphan')
 
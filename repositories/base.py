@@ -1,12 +1,21 @@
-from typing import Generic, Sequence, TypeVar
-from abc import ABC,abstractmethod
+from typing import AsyncIterator, Generic, Sequence, TypeVar
+from datetime import datetime
+from uuid import uuid4
+from abc import ABC
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select,update
+from sqlalchemy import ColumnElement,Select,select,update,func,tuple_
+from sqlalchemy.dialects.postgresql import Insert,insert
+from sqlalchemy.exc import IntegrityError
 from database import BaseModel
 
 ModelType = TypeVar('ModelType',bound=BaseModel) # type: ignore
 
 class BaseRepository(Generic[ModelType],ABC):
+
+    # unique columns that identify an instance at the moment of create it
+    _conflict_columns:tuple[str,...] = ('id',)
+    # columns maintained by the database operations, never set by an update
+    _maintained_columns:tuple[str,...] = ()
     
     def __init__(self,model:type[ModelType],db:AsyncSession):
         '''
@@ -18,66 +27,196 @@ class BaseRepository(Generic[ModelType],ABC):
     def _instance_to_dict(self,instance:ModelType) -> dict:
         return {
             key: getattr(instance, key)
-            for key in instance.__mapper__.columns.keys()
-            if hasattr(instance,key)
+            for key,column in instance.__mapper__.columns.items()
+            if column.computed is None and hasattr(instance,key)
         }
 
-    @abstractmethod
-    async def _get_instance_ignore_deleted(self,instance:ModelType) -> ModelType | None:
-        '''
-        gets an instance by eny of its unique fields
-
-        this method must be implemented by direct childs of this class
-        '''
-        raise NotImplementedError()
+    def _paginate(
+        self,
+        query:Select,
+        limit:int,
+        skip:int,
+        include_deleted:bool,
+        after:tuple[datetime,str] | None
+    ) -> Select:
+        # filters the deleted instances and applies the (created_at, id) ordering,
+        # using the keyset position when given instead of the offset
+        query = query.where(self._model.is_deleted == False) if not include_deleted else query
+        if after is None:
+            query = query.offset(skip)
+        else:
+            query = query.where(tuple_(self._model.created_at,self._model.id) > tuple_(*after))
+        return query.order_by(self._model.created_at,self._model.id).limit(limit)
 
     async def get_by_id(self,id:str,include_deleted:bool=False) -> ModelType | None:
         '''
         gets an instance by its id
         '''
         query = select(self._model)
-        query = query.where((self._model.id==id) & (self._model.is_deleted != True)) if not include_deleted else query.where(self._model.id==id)
+        query = query.where((self._model.id==id) & (self._model.is_deleted == False)) if not include_deleted else query.where(self._model.id==id)
         result = await self._db.execute(
             query
         )
         return result.scalar_one_or_none()
     
-    async def get_all(self,limit:int=100,skip:int=0,include_deleted:bool=False) -> Sequence[ModelType]:
+    def _version(self) -> ColumnElement:
+        # instant of the last change of an instance, its deletion included
+        return func.greatest(self._model.updated_at,self._model.deleted_at)
+
+    async def get_version(self,id:str,include_deleted:bool=False) -> datetime | None:
+        '''
+        gets the instant of the last change of an instance without loading it,
+        None if it doesn't exist
+        '''
+        query = select(self._version()).where(self._model.id==id)
+        query = query.where(self._model.is_deleted == False) if not include_deleted else query
+        return await self._db.scalar(query)
+
+    async def exists(self,id:str,include_deleted:bool=False) -> bool:
+        '''
+        checks if an instance exists without loading it
+        '''
+        query = select(self._model.id).where(self._model.id==id)
+        query = query.where(self._model.is_deleted == False) if not include_deleted else query
+        return bool(await self._db.scalar(select(query.exists())))
+    
+    async def get_all(
+        self,
+        limit:int=100,
+        skip:int=0,
+        include_deleted:bool=False,
+        after:tuple[datetime,str] | None=None
+    ) -> Sequence[ModelType]:
         '''
-        gets all the instances
+        gets all the instances ordered by (created_at, id)
 
         params:
             limit:int -> limit of results by response
-            skip:int -> number of registers to skip
+            skip:int -> number of registers to skip, ignored when 'after' is given
+            after:tuple[datetime,str] -> keyset position (created_at, id) of the
+                last seen instance, only instances after it are returned
         '''
-        query = select(self._model)
-        query = query.where(self._model.is_deleted != True) if not include_deleted else query
-        query = query.offset(skip).limit(limit)
+        query = self._paginate(select(self._model),limit,skip,include_deleted,after)
         result = await self._db.execute(query)
         return result.scalars().all()
     
+    async def stream(
+        self,
+        fields:Sequence[str],
+        batch_size:int,
+        include_deleted:bool=False
+    ) -> AsyncIterator[Sequence[dict]]:
+        '''
+        streams the given fields of all the instances ordered by (created_at, id)
+        through a server side cursor, in batches of 'batch_size' rows
+        '''
+        query = select(*[getattr(self._model,field) for field in fields])
+        query = query.where(self._model.is_deleted == False) if not include_deleted else query
+        query = query.order_by(self._model.created_at,self._model.id)
+        result = await self._db.stream(query,execution_options={'yield_per':batch_size})
+        async for rows in result.mappings().partitions():
+            yield rows
+
+    def _insert_values(self,instance:ModelType) -> dict:
+        # column values of a new instance, leaving the unset ones to its defaults
+        if instance.id is None:
+            instance.id = str(uuid4())
+        return {
+            key:value
+            for key,value in self._instance_to_dict(instance).items()
+            if not value is None
+        }
+
+    def _conflict_key(self,instance:ModelType) -> tuple:
+        return tuple(getattr(instance,column) for column in self._conflict_columns)
+
+    def _upsert_statement(self) -> Insert:
+        # inserts the instance, or restores the deleted instance that conflicts with
+        # it, a live conflicting instance is left untouched and no row is returned
+        return insert(self._model).on_conflict_do_update(
+            index_elements=[getattr(self._model,column) for column in self._conflict_columns],
+            set_={'is_deleted':False,'deleted_at':None,'updated_at':func.now()},
+            where=self._model.is_deleted == True
+        ).returning(self._model)
+
+    async def _after_insert(self,instances:Sequence[ModelType]) -> None:
+        # runs in the transaction that created (or restored) the instances
+        pass
+
+    async def _after_update(self,instance:ModelType) -> None:
+        # runs in the transaction that updates the instance
+        pass
+
+    async def _after_delete(self,instance:ModelType) -> None:
+        # runs in the transaction that deletes the instance
+        pass
+
+    async def _insert_many(self,instances:Sequence[ModelType]) -> list[ModelType | None]:
+        # inserts (or restores) all the instances in a single multi-row statement
+        # without committing, the results keep the order of the instances and
+        # have None for the conflicting or repeated ones
+        values = {}
+        for instance in instances:
+            instance_values = self._insert_values(instance)
+            values.setdefault(self._conflict_key(instance),instance_values)
+        if len(values) == 0:
+            return []
+        result = await self._db.scalars(
+            self._upsert_statement(),
+            list(values.values()),
+            execution_options={'populate_existing':True}
+        )
+        db_instances = {self._conflict_key(db_instance):db_instance for db_instance in result.all()}
+        return [db_instances.pop(self._conflict_key(instance),None) for instance in instances]
+
     async def create(self,instance:ModelType) -> ModelType | None:
         '''
-        creates a new instance
+        creates a new instance, restoring the deleted instance with the same
+        unique fields if any, in a single 'INSERT ... ON CONFLICT' statement
+
+        returns None if a live instance with the same unique fields exists
         '''
-        db_instance = await self._get_instance_ignore_deleted(instance)
-        if db_instance is None:
-            self._db.add(instance)
-            await self._db.commit()
-            await self._db.refresh(instance)
-            return instance
-        elif db_instance.is_deleted:
-            db_instance.restore()
-            update_data = self._instance_to_dict(db_instance)
-            await self._db.execute(
-                update(self._model).where(self._model.id==db_instance.id).values(**update_data)
+        try:
+            result = await self._db.scalars(
+                self._upsert_statement().values(**self._insert_values(instance)),
+                execution_options={'populate_existing':True}
             )
+            db_instance = result.one_or_none()
+            if not db_instance is None:
+                await self._after_insert([db_instance])
             await self._db.commit()
-            await self._db.refresh(db_instance)
-            return db_instance
-        else:
+        except IntegrityError:
+            await self._db.rollback()
             return None
+        return db_instance
         
+    async def create_many(self,instances:Sequence[ModelType]) -> Sequence[ModelType | None] | None:
+        '''
+        creates (or restores) many instances in a single transaction
+
+        returns a result for each instance, None for the ones that conflict with
+        a live instance or are repeated, or None for all the operation if any of
+        the instances breaks the integrity of the database
+        '''
+        try:
+            results = await self._insert_many(instances)
+            await self._after_insert([result for result in results if not result is None])
+            await self._db.commit()
+        except IntegrityError:
+            await self._db.rollback()
+            return None
+        return results
+        
+    def _update_values(self,update_instance:ModelType) -> dict:
+        # column values of an updated instance, refreshing its update instant
+        update_data = {
+            key:value
+            for key,value in self._instance_to_dict(update_instance).items()
+            if not key in self._maintained_columns
+        }
+        update_data['updated_at'] = func.now()
+        return update_data
+
     async def update(self,instance_id:str,update_instance:ModelType) -> ModelType | None:
         '''
         updates an instance
@@ -87,11 +226,11 @@ class BaseRepository(Generic[ModelType],ABC):
             return None
         
         update_instance.created_at = db_instance.created_at
-        update_instance.updated_at = db_instance.updated_at
-        update_data = self._instance_to_dict(update_instance)
+        update_data = self._update_values(update_instance)
         await self._db.execute(
-            update(self._model).where((self._model.is_deleted != True) & (self._model.id==instance_id)).values(**update_data)
+            update(self._model).where((self._model.is_deleted == False) & (self._model.id==instance_id)).values(**update_data)
         )
+        await self._after_update(db_instance)
         await self._db.commit()
         await self._db.refresh(db_instance)
         
@@ -106,6 +245,7 @@ class BaseRepository(Generic[ModelType],ABC):
             return False
         
         db_instance.soft_delete()
+        await self._after_delete(db_instance)
         await self._db.commit()
         await self._db.refresh(db_instance)
         
@@ -1,6 +1,9 @@
+from typing import Sequence
+from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from models import Comment
+from sqlalchemy import DateTime,Integer,bindparam,select,update,func,tuple_,true
+from sqlalchemy.orm import aliased
+from models import Comment,Post
 from .base import BaseRepository
 
 class CommentRepository(BaseRepository):
@@ -11,5 +14,117 @@ class CommentRepository(BaseRepository):
         '''
         super().__init__(Comment,db)
     
-    async def _get_instance_ignore_deleted(self, instance: Comment) -> Comment | None:
-        return await self.get_by_id(instance.id)
\ No newline at end of file
+    async def _after_insert(self,instances:Sequence[Comment]) -> None:
+        # the new (or restored) comments are counted in its posts, the counters
+        # are incremented so concurrent comments aren't lost
+        stats:dict[str,tuple[int,datetime]] = {}
+        for comment in instances:
+            count,last_comment_at = stats.get(comment.post_id,(0,comment.created_at))
+            stats[comment.post_id] = (count + 1,max(last_comment_at,comment.created_at))
+        if len(stats) == 0:
+            return
+        posts = Post.__table__
+        await self._db.execute(
+            update(posts).where(posts.c.id==bindparam('post_id_')).values(
+                comment_count=posts.c.comment_count + bindparam('count_',type_=Integer),
+                last_comment_at=func.greatest(
+                    posts.c.last_comment_at,
+                    bindparam('last_comment_at_',type_=DateTime(timezone=True))
+                ),
+                comments_changed_at=func.now()
+            ),
+            [
+                {'post_id_':post_id,'count_':count,'last_comment_at_':last_comment_at}
+                for post_id,(count,last_comment_at) in stats.items()
+            ]
+        )
+
+    async def _after_delete(self,instance:Comment) -> None:
+        # the deleted comment is discounted from its post, which takes the
+        # instant of its newest live comment
+        await self._db.flush()
+        posts = Post.__table__
+        last_comment_at = select(func.max(Comment.created_at)).where(
+            (Comment.post_id==instance.post_id) & (Comment.is_deleted == False)
+        ).scalar_subquery()
+        await self._db.execute(
+            update(posts).where(posts.c.id==instance.post_id).values(
+                comment_count=posts.c.comment_count - 1,
+                last_comment_at=last_comment_at,
+                comments_changed_at=func.now()
+            )
+        )
+
+    async def _after_update(self,instance:Comment) -> None:
+        # the post shows its newest comments, so it changes with them
+        posts = Post.__table__
+        await self._db.execute(
+            update(posts).where(posts.c.id==instance.post_id).values(comments_changed_at=func.now())
+        )
+
+    async def get_by_post(
+        self,
+        post_id:str,
+        limit:int=100,
+        include_deleted:bool=False,
+        before:tuple[datetime,str] | None=None
+    ) -> Sequence[Comment]:
+        '''
+        gets the comments of a post, newest first
+
+        params:
+            post_id:str -> id of the post
+            limit:int -> limit of results by response
+            before:tuple[datetime,str] -> keyset position (created_at, id) of the
+                last seen comment, only older comments are returned
+        '''
+        query = select(Comment).where(Comment.post_id==post_id)
+        query = query.where(Comment.is_deleted == False) if not include_deleted else query
+        if not before is None:
+            query = query.where(tuple_(Comment.created_at,Comment.id) < tuple_(*before))
+        query = query.order_by(Comment.created_at.desc(),Comment.id.desc()).limit(limit)
+        result = await self._db.execute(query)
+        return result.scalars().all()
+
+    async def get_latest_by_posts(
+        self,
+        post_ids:Sequence[str],
+        limit:int
+    ) -> dict[str,list[Comment]]:
+        '''
+        gets the newest 'limit' live comments of each one of the given posts
+        in a single query
+        '''
+        if len(post_ids) == 0 or limit <= 0:
+            return {}
+        # the newest comments of each post are read through a lateral subquery,
+        # served by the (post_id, created_at) index and bounded by 'limit' per post
+        page = select(Post.id.label('post_id')).where(Post.id.in_(post_ids)).subquery('page')
+        latest = select(Comment).where(
+            (Comment.post_id==page.c.post_id) & (Comment.is_deleted == False)
+        ).order_by(
+            Comment.created_at.desc(),
+            Comment.id.desc()
+        ).limit(limit).lateral('latest')
+        latest_comment = aliased(Comment,latest)
+        query = select(latest_comment).select_from(page).join(latest,true()).order_by(
+            latest.c.post_id,
+            latest.c.created_at.desc(),
+            latest.c.id.desc()
+        )
+        result = await self._db.execute(query)
+        comments:dict[str,list[Comment]] = {}
+        for comment in result.scalars().all():
+            comments.setdefault(comment.post_id,[]).append(comment)
+        return comments
+
+    async def get_existing_post_ids(self,post_ids:Sequence[str]) -> set[str]:
+        '''
+        gets which of the given post ids belong to live posts
+        '''
+        if len(post_ids) == 0:
+            return set()
+        result = await self._db.execute(
+            select(Post.id).where(Post.id.in_(set(post_ids)) & (Post.is_deleted == False))
+        )
+        return set(result.scalars().all())
@@ -1,20 +1,105 @@
+from typing import Any,Sequence
+from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select,update
-from models import Post
+from sqlalchemy import Select,select,update,delete,func,tuple_,cast
+from sqlalchemy.orm import load_only,noload
+from sqlalchemy.dialects.postgresql import REGCONFIG,insert
+from sqlalchemy.exc import IntegrityError
+from models import Post,Comment,Tag,User
+from models.post import posts_tags,SEARCH_CONFIGURATION
+from schemas import PostSummarySort
 from .base import BaseRepository
 
 class PostRepository(BaseRepository):
 
+    _conflict_columns = ('title',)
+    _maintained_columns = ('comment_count','last_comment_at','comments_changed_at')
+
     def __init__(self,db:AsyncSession):
         '''
         database repository for 'Post' entity
         '''
         super().__init__(Post,db)
     
-    async def _get_instance_ignore_deleted(self, instance: Post) -> Post | None:
-        if not instance.id is None:
-            return await self.get_by_id(instance.id,True)
-        return await self.get_by_title(instance.title,True)
+    async def get_version(
+        self,
+        id:str,
+        include_deleted:bool=False,
+        embedded_comments:int=10
+    ) -> datetime | None:
+        '''
+        gets the instant of the last change of a post or of what it shows without
+        loading it: its comments, the authors of its newest comments and its tags
+
+        the changes of the comments are kept in the post, and only the authors
+        of the newest 'embedded_comments' comments are read, so the query is
+        bounded whatever the number of comments of the post
+
+        params:
+            embedded_comments:int -> number of newest comments shown with the post
+        '''
+        embedded = select(Comment.author_id).where(
+            (Comment.post_id==id) & (Comment.is_deleted == False)
+        ).order_by(
+            Comment.created_at.desc(),
+            Comment.id.desc()
+        ).limit(embedded_comments).subquery('embedded')
+        authors = select(func.max(User.updated_at)).join(
+            embedded,
+            embedded.c.author_id==User.id
+        ).scalar_subquery()
+        tags = select(func.max(func.greatest(Tag.updated_at,Tag.deleted_at))).join(
+            posts_tags,
+            posts_tags.c.tag_id==Tag.id
+        ).where(posts_tags.c.post_id==id).scalar_subquery()
+        query = select(
+            func.greatest(self._version(),Post.comments_changed_at,authors,tags)
+        ).where(Post.id==id)
+        query = query.where(Post.is_deleted == False) if not include_deleted else query
+        return await self._db.scalar(query)
+    
+    def _tag_links(self,post:Post,tags:Sequence[Tag]) -> list[dict]:
+        # rows of 'posts_tags' that link a post with its tags
+        return [
+            {'post_id':post.id,'tag_id':tag.id,'post_created_at':post.created_at}
+            for tag in tags
+        ]
+
+    async def create(self, instance: Post) -> Post | None:
+        # the tags are linked in the same transaction that creates the post
+        results = await self.create_many([instance])
+        return None if results is None else results[0]
+    
+    async def create_many(self, instances: Sequence[Post]) -> Sequence[Post | None] | None:
+        tags = [list(instance.tags) for instance in instances]
+        for instance in instances:
+            instance.tags = []
+        try:
+            results = await self._insert_many(instances)
+            await self._after_insert([result for result in results if not result is None])
+            links = [
+                link
+                for result,post_tags in zip(results,tags)
+                if not result is None
+                for link in self._tag_links(result,post_tags)
+            ]
+            if len(links) > 0:
+                await self._db.execute(
+                    insert(posts_tags).on_conflict_do_nothing(),
+                    links
+                )
+            await self._db.commit()
+        except IntegrityError:
+            await self._db.rollback()
+            return None
+        if len(links) > 0:
+            # reloads the tags of the created posts in a single query
+            await self._db.execute(
+                select(Post).where(
+                    Post.id.in_([result.id for result in results if not result is None])
+                ).execution_options(populate_existing=True)
+            )
+        return results
     
     async def get_by_title(self,post_title:str,include_deleted:bool=False) -> Post | None:
         '''
@@ -24,23 +109,170 @@ class PostRepository(BaseRepository):
         if include_deleted:
             query = query.where(Post.title==post_title)
         else:
-            query = query.where((Post.title==post_title) & (Post.is_deleted != True))
+            query = query.where((Post.title==post_title) & (Post.is_deleted == False))
         result = await self._db.execute(query)
         return result.scalar_one_or_none()
     
+    def _summary_query(self,excerpt_length:int) -> Select:
+        # the posts without its content and comments, with an excerpt of the
+        # content, the number of live comments is kept in the posts
+        return select(
+            Post,
+            func.substr(Post.content,1,excerpt_length).label('excerpt')
+        ).options(
+            load_only(
+                Post.id,
+                Post.title,
+                Post.author_id,
+                Post.created_at,
+                Post.updated_at,
+                Post.is_deleted,
+                Post.comment_count,
+                Post.last_comment_at
+            ),
+            noload(Post.comments)
+        )
+
+    async def get_summaries(
+        self,
+        excerpt_length:int,
+        limit:int=100,
+        skip:int=0,
+        include_deleted:bool=False,
+        after:tuple[Any,str] | None=None,
+        sort:PostSummarySort='created_at'
+    ) -> Sequence[tuple[Post,str]]:
+        '''
+        gets the posts without its content and comments, along with an excerpt
+        of the content of each one
+
+        params:
+            excerpt_length:int -> max length of the excerpt
+            limit:int -> limit of results by response
+            skip:int -> number of registers to skip, ignored when 'after' is given
+            after:tuple[Any,str] -> keyset position to continue from, the value
+                of the sort key and the id of the last seen post
+            sort:PostSummarySort -> order of the posts, 'created_at' is the oldest
+                first, 'most_discussed' and 'recently_active' sort by the comment
+                count and the last activity, greatest first
+        '''
+        query = self._summary_query(excerpt_length)
+        if sort == 'created_at':
+            query = self._paginate(query,limit,skip,include_deleted,after)
+        else:
+            # keyset over the indexes of the live posts by comment count and activity
+            key = Post.comment_count if sort == 'most_discussed' else func.coalesce(Post.last_comment_at,Post.created_at)
+            query = query.where(Post.is_deleted == False) if not include_deleted else query
+            if after is None:
+                query = query.offset(skip)
+            else:
+                query = query.where(tuple_(key,Post.id) < tuple_(*after))
+            query = query.order_by(key.desc(),Post.id.desc()).limit(limit)
+        result = await self._db.execute(query)
+        return [tuple(row) for row in result.all()]
+
+    async def get_summaries_by_tag(
+        self,
+        tag_id:str,
+        excerpt_length:int,
+        limit:int=100,
+        include_deleted:bool=False,
+        after:tuple[datetime,str] | None=None
+    ) -> Sequence[tuple[Post,str]]:
+        '''
+        gets the summaries of the posts with a tag, oldest first, read in order
+        from the (tag_id, post_created_at, post_id) index of 'posts_tags'
+
+        params:
+            tag_id:str -> id of the tag, resolved by the caller
+            excerpt_length:int -> max length of the excerpt
+            limit:int -> limit of results by response
+            after:tuple[datetime,str] -> keyset position to continue from
+        '''
+        query = self._summary_query(excerpt_length).join(
+            posts_tags,
+            posts_tags.c.post_id==Post.id
+        ).where(posts_tags.c.tag_id==tag_id)
+        query = query.where(Post.is_deleted == False) if not include_deleted else query
+        # the keyset is taken from 'posts_tags', so the page is read in order from
+        # its (tag_id, post_created_at, post_id) index and stops at the limit
+        if not after is None:
+            query = query.where(tuple_(posts_tags.c.post_created_at,posts_tags.c.post_id) > tuple_(*after))
+        query = query.order_by(posts_tags.c.post_created_at,posts_tags.c.post_id).limit(limit)
+        result = await self._db.execute(query)
+        return [tuple(row) for row in result.all()]
+
+    async def search(
+        self,
+        text:str,
+        excerpt_length:int,
+        limit:int=100,
+        include_deleted:bool=False,
+        after:tuple[float,str] | None=None
+    ) -> Sequence[tuple[Post,str,float]]:
+        '''
+        searches the posts matching the text in its title or content, ranked by
+        relevance, along with the fields of its summaries and the rank of each one
+
+        params:
+            text:str -> text to search, in web search syntax
+            excerpt_length:int -> max length of the excerpt
+            limit:int -> limit of results by response
+            after:tuple[float,str] -> keyset position (rank, id) of the last seen
+                post, only less relevant posts are returned
+        '''
+        search_query = func.websearch_to_tsquery(cast(SEARCH_CONFIGURATION,REGCONFIG),text)
+        rank = func.ts_rank_cd(Post.search_vector,search_query)
+        ranked = select(Post.id,rank.label('rank')).where(Post.search_vector.op('@@')(search_query))
+        ranked = ranked.where(Post.is_deleted == False) if not include_deleted else ranked
+        if not after is None:
+            ranked = ranked.where(tuple_(rank,Post.id) < tuple_(*after))
+        ranked = ranked.order_by(rank.desc(),Post.id.desc()).limit(limit).subquery()
+        query = self._summary_query(excerpt_length).add_columns(ranked.c.rank).join(
+            ranked,
+            ranked.c.id==Post.id
+        ).order_by(ranked.c.rank.desc(),Post.id.desc())
+        result = await self._db.execute(query)
+        return [tuple(row) for row in result.all()]
+    
+    async def rebuild_comment_stats(self) -> int:
+        '''
+        recomputes the comment count and the last comment instant of all the
+        posts from its live comments, returns the number of posts updated
+        '''
+        live_comments = (Comment.post_id==Post.id) & (Comment.is_deleted == False)
+        result = await self._db.execute(
+            update(Post).values(
+                comment_count=select(func.count(Comment.id)).where(live_comments).scalar_subquery(),
+                last_comment_at=select(func.max(Comment.created_at)).where(live_comments).scalar_subquery()
+            ),
+            execution_options={'synchronize_session':False}
+        )
+        await self._db.commit()
+        return result.rowcount
+
     async def update(self, instance_id: str, update_instance: Post) -> Post | None:
         db_instance = await self.get_by_id(instance_id)
         if db_instance is None:
             return None
         
         update_instance.created_at = db_instance.created_at
-        update_instance.updated_at = db_instance.updated_at
-        update_data = self._instance_to_dict(update_instance)
+        update_data = self._update_values(update_instance)
         await self._db.execute(
-            update(self._model).where((self._model.is_deleted != True) & (self._model.id==instance_id)).values(**update_data)
+            update(self._model).where((self._model.is_deleted == False) & (self._model.id==instance_id)).values(**update_data)
         )
         if update_instance.tags:
-            db_instance.tags = update_instance.tags
+            # the links are replaced in the statements, the tags are reloaded on refresh
+            tag_ids = [tag.id for tag in update_instance.tags]
+            await self._db.execute(
+                delete(posts_tags).where(
+                    (posts_tags.c.post_id==instance_id) & posts_tags.c.tag_id.not_in(tag_ids)
+                )
+            )
+            await self._db.execute(
+                insert(posts_tags).on_conflict_do_nothing(),
+                self._tag_links(db_instance,update_instance.tags)
+            )
         await self._db.commit()
         await self._db.refresh(db_instance)
         
@@ -1,22 +1,22 @@
+from typing import Sequence
+from uuid import uuid4
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from models import Tag
+from models.post import posts_tags
 from .base import BaseRepository
 
 class TagRepository(BaseRepository[Tag]):
 
+    _conflict_columns = ('name',)
+
     def __init__(self,db:AsyncSession):
         '''
         repository for 'Tag'
         '''
         super().__init__(Tag,db)
     
-    async def _get_instance_ignore_deleted(self, instance: Tag) -> Tag | None:
-        db_tag = await self.get_by_id(instance.id,True)
-        if not db_tag is None:
-            return db_tag
-        return await self.get_by_name(instance.name,True)
-
     async def get_by_name(self,tag_name:str,include_deleted:bool=False) -> Tag | None:
         '''
         gets a tag by its name
@@ -29,4 +29,56 @@ class TagRepository(BaseRepository[Tag]):
         tag = result.scalar_one_or_none()
         if not tag is None and tag.is_deleted and not include_deleted:
             return None
-        return tag
\ No newline at end of file
+        return tag
+
+    async def get_or_create_many(self,tags:Sequence[dict]) -> tuple[Sequence[Tag],Sequence[Tag]]:
+        '''
+        gets the tags with the given names, creating the missing ones and
+        restoring the deleted ones, without committing, returns the tags and
+        the restored ones
+
+        the lookup is a single 'IN' query and the missing tags are created with
+        a single multi-row insert that skips the names created concurrently
+
+        params:
+            tags:Sequence[dict] -> fields of the tags, 'name' is required
+        '''
+        values = {tag['name']:tag for tag in tags}
+        if len(values) == 0:
+            return [],[]
+        result = await self._db.execute(
+            select(Tag).where(Tag.name.in_(values.keys()))
+        )
+        db_tags = {tag.name:tag for tag in result.scalars().all()}
+        missing = [
+            {'id':str(uuid4()),**tag}
+            for name,tag in values.items()
+            if not name in db_tags
+        ]
+        if len(missing) > 0:
+            created = await self._db.scalars(
+                insert(Tag).on_conflict_do_nothing(index_elements=[Tag.name]).returning(Tag),
+                missing
+            )
+            db_tags.update({tag.name:tag for tag in created.all()})
+        if len(db_tags) < len(values):
+            # the remaining tags were created by a concurrent writer
+            result = await self._db.execute(
+                select(Tag).where(Tag.name.in_([name for name in values if not name in db_tags]))
+            )
+            db_tags.update({tag.name:tag for tag in result.scalars().all()})
+        restored = [tag for tag in db_tags.values() if tag.is_deleted]
+        for tag in restored:
+            tag.restore()
+        return [db_tags[name] for name in values if name in db_tags],restored
+
+    async def get_post_ids(self,tag_ids:Sequence[str]) -> Sequence[str]:
+        '''
+        gets the ids of the posts linked to any of the tags
+        '''
+        if len(tag_ids) == 0:
+            return []
+        result = await self._db.scalars(
+            select(posts_tags.c.post_id).where(posts_tags.c.tag_id.in_(tag_ids)).distinct()
+        )
+        return result.all()
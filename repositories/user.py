@@ -5,19 +5,48 @@ from .base import BaseRepository
 
 class UserRepository(BaseRepository):
 
+    _conflict_columns = ('username',)
+    _maintained_columns = ('token_version',)
+
     def __init__(self,db:AsyncSession):
         '''
         repository for 'User' entity
         '''
         super().__init__(User,db)
     
-    async def _get_instance_ignore_deleted(self, instance: User) -> User | None:
-        if not instance.id is None:
-            return await self.get_by_id(instance.id,True)
-        if not instance.username is None:
-            return await self.get_by_username(instance.username,True)
-        if not instance.email is None:
-            return await self.get_by_email(instance.email,True)
+    def _update_values(self, update_instance: User) -> dict:
+        # an update can change the password or the username, so it revokes
+        # the issued tokens in the same statement
+        update_data = super()._update_values(update_instance)
+        update_data['token_version'] = User.token_version + 1
+        return update_data
+
+    async def _after_delete(self, instance: User) -> None:
+        instance.token_version = User.token_version + 1
+
+    async def get_token_version(self,user_id:str) -> int | None:
+        '''
+        gets the current token version of a live user, None if it doesn't exist
+        '''
+        result = await self._db.execute(
+            select(User.token_version).where((User.id==user_id) & (User.is_deleted == False))
+        )
+        return result.scalar_one_or_none()
+
+    async def revoke_tokens(self,user_id:str) -> int | None:
+        '''
+        revokes all the issued tokens of a live user bumping its token version,
+        returns the new version, None if the user doesn't exist
+        '''
+        result = await self._db.execute(
+            update(User).where(
+                (User.id==user_id) & (User.is_deleted == False)
+            ).values(token_version=User.token_version + 1).returning(User.token_version),
+            execution_options={'synchronize_session':False}
+        )
+        version = result.scalar_one_or_none()
+        await self._db.commit()
+        return version
 
     async def get_by_username(self,username:str,include_deleted:bool=False) -> User | None:
         '''
@@ -27,7 +56,7 @@ class UserRepository(BaseRepository):
         if include_deleted:
             query = query.where(User.username==username)
         else:
-            query = query.where((User.username==username) & (User.is_deleted != True))
+            query = query.where((User.username==username) & (User.is_deleted == False))
         result = await self._db.execute(query)
         return result.scalar_one_or_none()
     
@@ -39,6 +68,6 @@ class UserRepository(BaseRepository):
         if include_deleted:
             query = query.where(User.email==email)
         else:
-            query = query.where((User.email==email) & (User.is_deleted != True))
+            query = query.where((User.email==email) & (User.is_deleted == False))
         result = await self._db.execute(query)
         return result.scalar_one_or_none()
\ No newline at end of file
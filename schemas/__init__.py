@@ -1,12 +1,16 @@
 from .user import UserCreateSchema,UserSchema,UserUpdateSchema
-from .token import TokenDataSchema,TokenSchema
+from .token import TokenDataSchema,TokenSchema,PrincipalSchema
 from .post import (
     PostSchema,
     PostCreateSchema,
     PostUpdateSchema,
     PostTagNestedSchema,
     PostUserNestedSchema,
-    PostCommentNestedSchema
+    PostCommentNestedSchema,
+    PostSummarySchema,
+    PostSearchResultSchema,
+    PostSummarySort
 )
-from .comment import CommentSchema,CommentCreateSchema,CommentUpdateSchema
-from .tag import TagCreateSchema,TagUpdateSchema,TagSchema
\ No newline at end of file
+from .comment import CommentSchema,CommentCreateSchema,CommentUpdateSchema,CommentBulkCreateSchema
+from .tag import TagCreateSchema,TagUpdateSchema,TagSchema
+from .bulk import BulkItemResultSchema
\ No newline at end of file
@@ -0,0 +1,13 @@
+from typing import Generic,Optional,TypeVar
+from pydantic import BaseModel
+
+ItemSchemaType = TypeVar('ItemSchemaType',bound=BaseModel)
+
+class BulkItemResultSchema(BaseModel,Generic[ItemSchemaType]):
+    '''
+    result of an item of a bulk operation
+    '''
+    index:int
+    created:bool
+    item:Optional[ItemSchemaType] = None
+    detail:Optional[str] = None
@@ -14,6 +14,12 @@ class CommentCreateSchema(CommentBaseSchema):
     schema for create a comment
     '''
 
+class CommentBulkCreateSchema(CommentCreateSchema):
+    '''
+    schema for create a comment in a bulk operation
+    '''
+    post_id:str
+
 class CommentUpdateSchema(CommentBaseSchema):
     '''
     schema for update a comment
@@ -1,4 +1,5 @@
-from typing import Annotated,Optional,Sequence
+from typing import Annotated,Literal,Optional,Sequence
+from datetime import datetime
 from pydantic import BaseModel, EmailStr
 from pydantic.types import StringConstraints
 from settings import ENVIRONMENT
@@ -72,4 +73,26 @@ class PostSchema(PostBaseSchema,TimestampSchema):
     comments:Optional[Sequence[PostCommentNestedSchema]]
     
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class PostSummarySchema(TimestampSchema):
+    '''
+    lightweight schema of 'Post' for list views
+    '''
+    id:str
+    title:str
+    excerpt:str
+    author_id:str
+    author:str
+    tags:Sequence[str]
+    comment_count:int
+    last_comment_at:Optional[datetime] = None
+
+# orders of the post summaries
+PostSummarySort = Literal['created_at','most_discussed','recently_active']
+
+class PostSearchResultSchema(PostSummarySchema):
+    '''
+    summary of a 'Post' found by a search, with its relevance
+    '''
+    rank:float
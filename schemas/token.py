@@ -11,4 +11,11 @@ class TokenDataSchema(BaseModel):
     '''
     schema for the token's data
     '''
-    username:str | None = None
\ No newline at end of file
+    username:str | None = None
+
+class PrincipalSchema(BaseModel):
+    '''
+    schema for the authenticated user, built from the token's claims
+    '''
+    id:str
+    username:str
\ No newline at end of file
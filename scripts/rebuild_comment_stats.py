@@ -0,0 +1,20 @@
+'''
+recomputes the comment count and the last comment instant of all the posts
+from its live comments, to repair them after changes made outside the api
+
+run it from the root of the project:
+    python -m scripts.rebuild_comment_stats
+'''
+import asyncio
+from database import ENGINE
+from database.session import AsyncSessionLocal
+from repositories import PostRepository
+
+async def main():
+    async with AsyncSessionLocal() as session:
+        updated = await PostRepository(session).rebuild_comment_stats()
+    await ENGINE.dispose()
+    print(f'comment stats rebuilt for {updated} posts')
+
+if __name__ == '__main__':
+    asyncio.run(main())
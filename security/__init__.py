@@ -1,7 +1,12 @@
 from fastapi import Depends
 from models import User
 from services import AuthorizationService
-from .auth import get_current_user,create_access_token
+from .auth import (
+    get_current_user,
+    create_access_token,
+    create_user_access_token,
+    get_token_principal
+)
 
 def get_authorization_service(user:User=Depends(get_current_user)):
     service = AuthorizationService(user)
@@ -4,9 +4,12 @@ from datetime import datetime,timedelta
 import datetime as dt
 from fastapi import Depends,HTTPException,status
 from fastapi.security import OAuth2PasswordBearer
-from schemas import TokenDataSchema,UserSchema
+from schemas import PrincipalSchema
 from settings import ENVIRONMENT
+from models import User
 from services import UserService,get_user_service
+from cache import TOKEN_CLAIMS_CACHE
+from middlewares import timed_phase
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f'{ENVIRONMENT.GLOBAL_API_PREFIX}/users/token')
 
@@ -23,28 +26,59 @@ def create_access_token(data:dict,expires_delta:timedelta | None = None) -> str:
     encoded_jwt = jwt.encode(to_encode,ENVIRONMENT.SECRET_KEY,algorithm=ENVIRONMENT.ALGORITHM)
     return encoded_jwt
 
+def create_user_access_token(user:User,expires_delta:timedelta | None = None) -> str:
+    '''
+    creates a new access token for a user, carrying its id and current token
+    version so the user can be authenticated without loading it
+    '''
+    return create_access_token(
+        data={'sub':user.username,'uid':user.id,'token_version':user.token_version},
+        expires_delta=expires_delta
+    )
+
+def decode_access_token(token:str) -> dict | None:
+    '''
+    gets the verified claims of an access token, None if it isn't valid
+    '''
+    payload = TOKEN_CLAIMS_CACHE.get(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token,ENVIRONMENT.SECRET_KEY,algorithms=[ENVIRONMENT.ALGORITHM])
+        except PyJWTError:
+            return None
+        TOKEN_CLAIMS_CACHE.set(token,payload)
+    return payload
+
+def get_token_principal(token:str) -> str | None:
+    '''
+    gets the id of the user of an access token, None if it isn't valid
+    '''
+    payload = decode_access_token(token)
+    return None if payload is None else payload.get('uid')
+
 async def get_current_user(
     token:str = Depends(oauth2_scheme),
     service:UserService = Depends(get_user_service)
-) -> UserSchema:
+) -> PrincipalSchema:
     '''
-    gets the current user from the authorization token
+    gets the current user from the authorization token, the token is only
+    accepted while its version is the current token version of the user
     '''
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail='Could not validate credentials',
         headers={'WWW-Authenticate':'Bearer'}
     )
-    try:
-        payload = jwt.decode(token,ENVIRONMENT.SECRET_KEY,algorithms=[ENVIRONMENT.ALGORITHM])
-        username:str = payload.get('sub')
-        if username is None:
+    with timed_phase('auth'):
+        payload = decode_access_token(token)
+        if payload is None:
+            raise credentials_exception
+        username = payload.get('sub')
+        user_id = payload.get('uid')
+        token_version = payload.get('token_version')
+        if username is None or user_id is None or token_version is None:
             raise credentials_exception
-        token_data = TokenDataSchema(username=username)
-    except PyJWTError:
-        raise credentials_exception
     
-    user = await service.get_by_username(username)
-    if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+        if await service.get_token_version(user_id) != token_version:
+            raise credentials_exception
+        return PrincipalSchema(id=user_id,username=username)
@@ -14,6 +14,7 @@ from .post import PostService
 from .comment import CommentService
 from .tag import TagService
 from .authorization import AuthorizationService
+from .hashing import PasswordHasher,PASSWORD_HASHER
 
 def get_user_service(repository:UserRepository = Depends(get_user_repository)):
     '''
@@ -27,14 +28,16 @@ def get_user_service(repository:UserRepository = Depends(get_user_repository)):
 
 def get_post_service(
     post_repository:PostRepository = Depends(get_post_repository),
-    tag_repository:TagRepository = Depends(get_tag_repository)
+    tag_repository:TagRepository = Depends(get_tag_repository),
+    comment_repository:CommentRepository = Depends(get_comment_repository)
 ):
     '''
     gets the post service dependency
     '''
     service = PostService(
         post_repository,
-        tag_repository
+        tag_repository,
+        comment_repository
     )
     try:
         yield service
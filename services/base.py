@@ -1,8 +1,11 @@
-from typing import Sequence,Generic,TypeVar
+from typing import AsyncIterator,Sequence,Generic,TypeVar
+from datetime import datetime
 from pydantic import BaseModel as SchemasBaseModel
 from abc import ABC,abstractmethod
 from database import BaseModel as ModelsBaseModel
 from repositories import BaseRepository
+from schemas import BulkItemResultSchema
+from cache import RESPONSE_CACHE,entity_tag,list_tag
 
 ModelType = TypeVar('ModelType',bound=ModelsBaseModel) # type: ignore
 RepositoryType = TypeVar('RepositoryType',bound=BaseRepository)
@@ -20,6 +23,9 @@ class BaseService(
     ],
     ABC
 ):
+
+    # name of the entity in the tags of the cached responses
+    _cache_entity:str = ''
     
     def __init__(
             self,
@@ -42,11 +48,41 @@ class BaseService(
         self._model = model
         self._exclude_fields = exclude_fields
         self._exclude_unset = exclude_unset or len(exclude_fields) > 0
+        self._export_fields:Sequence[str] = ['id','created_at','updated_at']
+
+    @property
+    def export_fields(self) -> Sequence[str]:
+        '''
+        fields of the instances included in the exports
+        '''
+        return self._export_fields
 
     async def _to_schema(self,model:ModelType) -> SchemaType:
         return model # type: ignore
+
+    async def _to_schemas(self,models:Sequence[ModelType]) -> Sequence[SchemaType]:
+        instances = []
+        for model in models:
+            ins = await self._to_schema(model)
+            instances.append(ins)
+        return instances
     
-    def _get_instance(self,**fields) -> ModelType:
+    def _cache_tags(self,instance_id:str,model:ModelType | None,created:bool) -> list[str]:
+        # tags of the cached responses affected by a change in an instance, the
+        # responses embedding it are tagged with it too
+        return [entity_tag(self._cache_entity,instance_id),list_tag(self._cache_entity)]
+
+    async def _related_cache_tags(self,instance_ids:Sequence[str]) -> list[str]:
+        # tags of the cached responses of other instances showing the changed ones
+        return []
+
+    async def _invalidate(self,instance_id:str,model:ModelType | None,created:bool=False) -> None:
+        await RESPONSE_CACHE.invalidate(
+            *self._cache_tags(instance_id,model,created),
+            *await self._related_cache_tags([instance_id])
+        )
+
+    async def _get_instance(self,**fields) -> ModelType:
         return self._model(**fields)
     
     async def _process_before_update(
@@ -56,7 +92,7 @@ class BaseService(
         **extra_fields
     ) -> ModelType:
         # creates the instance with the updated data
-        db_instance = self._get_instance(
+        db_instance = await self._get_instance(
             **{
                 **update_data.model_dump(
                     exclude=self._exclude_fields,
@@ -75,6 +111,23 @@ class BaseService(
     ) -> ModelType:
         return instance
 
+    async def _process_before_create_many(
+        self,
+        instances:Sequence[ModelType],
+        create_values:Sequence[CreateSchemaType]
+    ) -> Sequence[ModelType]:
+        result = []
+        for instance,create_value in zip(instances,create_values):
+            result.append(await self._process_before_create(instance,create_value))
+        return result
+
+    async def _validate_many(
+        self,
+        create_values:Sequence[CreateSchemaType]
+    ) -> Sequence[str | None]:
+        # error of each value that can't be created, None for the valid ones
+        return [None for _ in create_values]
+
     @abstractmethod
     async def _process_before_update_modifier(
         self,
@@ -89,13 +142,28 @@ class BaseService(
         gets an instance by its id
         '''
         model = await self._repository.get_by_id(instance_id,include_deleted)
-        return await self._to_schema(model) # type: ignore
+        if model is None:
+            return None
+        return await self._to_schema(model)
+    
+    async def get_version(self,instance_id:str,include_deleted:bool=False) -> datetime | None:
+        '''
+        gets the instant of the last change of an instance, None if it doesn't exist
+        '''
+        return await self._repository.get_version(instance_id,include_deleted)
+
+    async def exists(self,instance_id:str,include_deleted:bool=False) -> bool:
+        '''
+        checks if an instance exists
+        '''
+        return await self._repository.exists(instance_id,include_deleted)
     
     async def get_all(
         self,
         limit:int=100,
         skip:int=0,
-        include_deleted:bool=False
+        include_deleted:bool=False,
+        after:tuple[datetime,str] | None=None
     ) -> Sequence[SchemaType]:
         '''
         gets all the instances
@@ -103,19 +171,27 @@ class BaseService(
         params:
             limit:int -> limit of results by response
             skip:int -> number of registers to skip
+            after:tuple[datetime,str] -> keyset position to continue from
         '''
-        results = await self._repository.get_all(limit,skip,include_deleted)
-        instances = []
-        for result in results:
-            ins = await self._to_schema(result)
-            instances.append(ins)
-        return instances
+        results = await self._repository.get_all(limit,skip,include_deleted,after)
+        return await self._to_schemas(results)
+    
+    async def export(
+        self,
+        batch_size:int,
+        include_deleted:bool=False
+    ) -> AsyncIterator[Sequence[dict]]:
+        '''
+        streams the exported fields of all the instances in batches
+        '''
+        async for rows in self._repository.stream(self._export_fields,batch_size,include_deleted):
+            yield rows
     
     async def create(self,value:CreateSchemaType,**extra_fields) -> SchemaType | None:
         '''
         creates a new instance
         '''
-        db_instance = self._get_instance(
+        db_instance = await self._get_instance(
             **{
                 **value.model_dump(
                     exclude=self._exclude_fields,
@@ -128,8 +204,58 @@ class BaseService(
         result = await self._repository.create(db_instance)
         if result is None:
             return None
+        await self._invalidate(result.id,result,True)
         return await self._to_schema(result)
     
+    async def create_many(
+        self,
+        values:Sequence[CreateSchemaType],
+        **extra_fields
+    ) -> Sequence[BulkItemResultSchema] | None:
+        '''
+        creates many instances in a single transaction
+
+        returns a result for each value, or None if the values break the
+        integrity of the database
+        '''
+        errors = await self._validate_many(values)
+        valid_values = [value for value,error in zip(values,errors) if error is None]
+        db_instances = []
+        for value in valid_values:
+            db_instances.append(await self._get_instance(
+                **{
+                    **value.model_dump(
+                        exclude=self._exclude_fields,
+                        exclude_unset=self._exclude_unset
+                    ),
+                    **extra_fields
+                }
+            ))
+        db_instances = await self._process_before_create_many(db_instances,valid_values)
+        results = await self._repository.create_many(db_instances)
+        if results is None:
+            return None
+        tags = {
+            tag
+            for result in results
+            if not result is None
+            for tag in self._cache_tags(result.id,result,True)
+        }
+        tags.update(await self._related_cache_tags([result.id for result in results if not result is None]))
+        if len(tags) > 0:
+            await RESPONSE_CACHE.invalidate(*tags)
+        schemas = iter(await self._to_schemas([result for result in results if not result is None]))
+        created = iter(results)
+        items = []
+        for index,error in enumerate(errors):
+            if not error is None:
+                items.append(BulkItemResultSchema(index=index,created=False,detail=error))
+            elif next(created) is None:
+                items.append(BulkItemResultSchema(index=index,created=False,detail='Conflicts with an existing item'))
+            else:
+                items.append(BulkItemResultSchema(index=index,created=True,item=next(schemas)))
+        return items
+    
     async def update(
         self,
         instance_id:str,
@@ -147,10 +273,17 @@ class BaseService(
             existing_instance,
             **{**extra_values,'id':instance_id}
         )
-        return await self._repository.update(instance_id,db_instance)
+        result = await self._repository.update(instance_id,db_instance)
+        if result is None:
+            return None
+        await self._invalidate(instance_id,result)
+        return await self._to_schema(result)
     
     async def delete(self,instance_id:str) -> bool:
         '''
         deletes an instance
         '''
-        return await self._repository.delete(instance_id)
\ No newline at end of file
+        result = await self._repository.delete(instance_id)
+        if result:
+            await self._invalidate(instance_id,None)
+        return result
\ No newline at end of file
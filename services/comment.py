@@ -1,7 +1,9 @@
 from typing import Sequence
+from datetime import datetime
 from repositories import CommentRepository
 from models import Comment
-from schemas import CommentCreateSchema,CommentUpdateSchema,CommentSchema
+from schemas import CommentCreateSchema,CommentUpdateSchema,CommentSchema,CommentBulkCreateSchema
+from cache import entity_tag
 from .base import BaseService
 
 # class CommentService:
@@ -76,11 +78,22 @@ class CommentService(
     ]
 ):
     
+    _cache_entity = 'comment'
+
     def __init__(self,repository:CommentRepository):
         '''
         service for 'Comment'
         '''
         super().__init__(Comment,repository)
+        self._export_fields = ['id','content','author_id','post_id','created_at','updated_at']
+    
+    def _cache_tags(self,instance_id:str,model:Comment | None,created:bool) -> list[str]:
+        # the posts embed its newest comments
+        tags = super()._cache_tags(instance_id,model,created)
+        return tags if model is None else tags + [entity_tag('post',model.post_id)]
+
+    async def _to_schema(self, model: Comment) -> CommentSchema:
+        return CommentSchema.model_validate(model,from_attributes=True)
     
     async def _process_before_update_modifier(
         self,
@@ -93,4 +106,39 @@ class CommentService(
         model.is_deleted = existing_model.is_deleted
         model.post_id = existing_model.post_id
         model.author_id = existing_model.author_id
-        return model
\ No newline at end of file
+        return model
+    
+    async def _validate_many(
+        self,
+        create_values: Sequence[CommentBulkCreateSchema]
+    ) -> Sequence[str | None]:
+        post_ids = await self._repository.get_existing_post_ids(
+            [create_value.post_id for create_value in create_values]
+        )
+        return [
+            None if create_value.post_id in post_ids else f'Not post with id "{create_value.post_id}" found'
+            for create_value in create_values
+        ]
+    
+    async def get_by_post(
+        self,
+        post_id:str,
+        limit:int=100,
+        include_deleted:bool=False,
+        before:tuple[datetime,str] | None=None
+    ) -> Sequence[CommentSchema]:
+        '''
+        gets the comments of a post, newest first
+        '''
+        results = await self._repository.get_by_post(post_id,limit,include_deleted,before)
+        return await self._to_schemas(results)
+
+    async def delete(self,instance_id:str) -> bool:
+        # the comment is loaded to know the post showing it
+        comment = await self._repository.get_by_id(instance_id)
+        if comment is None:
+            return False
+        result = await self._repository.delete(instance_id)
+        if result:
+            await self._invalidate(instance_id,comment)
+        return result
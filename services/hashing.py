@@ -0,0 +1,114 @@
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+import asyncio
+from settings import ENVIRONMENT
+from metrics import Histogram,counter,gauge,histogram
+
+def _hash_password(password:str) -> str:
+    return ENVIRONMENT.CRYPT_CONTEXT.hash(password)
+
+def _verify_password(password:str,hashed_password:str) -> bool:
+    return ENVIRONMENT.CRYPT_CONTEXT.verify(password,hashed_password)
+
+class PasswordHasher:
+
+    def __init__(self,workers:int,max_concurrency:int):
+        '''
+        runs the password hashing and verification in a process pool, out
+        of the event loop, admitting at most 'max_concurrency' calls at once
+
+        params:
+            workers -> number of processes of the pool
+            max_concurrency -> max number of calls submitted to the pool at
+                the same time, the rest wait in queue
+        '''
+        self._workers = workers
+        self._max_concurrency = max_concurrency
+        self._executor:ProcessPoolExecutor | None = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._queued = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._queue_time = 0.0
+        self._queue_wait = Histogram()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._workers)
+        return self._executor
+
+    async def _run(self,function,*args):
+        self._queued += 1
+        start = perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._queued -= 1
+        wait = perf_counter() - start
+        self._queue_time += wait
+        self._queue_wait.observe(wait)
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(),function,*args)
+        finally:
+            self._in_flight -= 1
+            self._completed += 1
+            self._semaphore.release()
+
+    async def hash(self,password:str) -> str:
+        '''
+        hashes a password
+        '''
+        return await self._run(_hash_password,password)
+
+    async def verify(self,password:str,hashed_password:str) -> bool:
+        '''
+        verifies a password against its hash
+        '''
+        return await self._run(_verify_password,password,hashed_password)
+
+    def stats(self) -> dict:
+        '''
+        current state of the hasher: pool size, concurrency limit, calls
+        waiting in queue, calls running, calls completed and the total
+        time (in seconds) spent waiting in queue
+        '''
+        return {
+            'workers':self._workers,
+            'max_concurrency':self._max_concurrency,
+            'queued':self._queued,
+            'in_flight':self._in_flight,
+            'completed':self._completed,
+            'queue_time_seconds':self._queue_time
+        }
+
+    def collect(self) -> list[str]:
+        '''
+        lines of the metrics of the hasher
+        '''
+        return [
+            *gauge('password_hashing_workers','Processes of the password hashing pool',[({},self._workers)]),
+            *gauge('password_hashing_max_concurrency','Max password hashing calls at once',[({},self._max_concurrency)]),
+            *gauge('password_hashing_queued','Password hashing calls waiting in queue',[({},self._queued)]),
+            *gauge('password_hashing_in_flight','Password hashing calls running',[({},self._in_flight)]),
+            *counter('password_hashing_completed_total','Password hashing calls completed',[({},self._completed)]),
+            *histogram(
+                'password_hashing_queue_wait_seconds',
+                'Time waited in queue by the password hashing calls',
+                self._queue_wait
+            )
+        ]
+
+    def shutdown(self) -> None:
+        '''
+        shuts down the process pool
+        '''
+        if self._executor is not None:
+            self._executor.shutdown(wait=False,cancel_futures=True)
+            self._executor = None
+
+PASSWORD_HASHER = PasswordHasher(
+    ENVIRONMENT.PASSWORD_HASHING_WORKERS,
+    ENVIRONMENT.PASSWORD_HASHING_MAX_CONCURRENCY
+)
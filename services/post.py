@@ -1,4 +1,5 @@
-from typing import Sequence
+from typing import Any,Sequence
+from datetime import datetime
 from repositories import PostRepository,TagRepository,CommentRepository,UserRepository
 from models import Post,Tag,Comment,User
 from schemas import (
@@ -6,8 +7,13 @@ from schemas import (
     PostUpdateSchema,
     PostSchema,
     PostTagNestedSchema,
-    PostCommentNestedSchema
+    PostCommentNestedSchema,
+    PostSummarySchema,
+    PostSearchResultSchema,
+    PostSummarySort
 )
+from settings import ENVIRONMENT
+from cache import entity_tag,list_tag
 from .base import BaseService
 
 class PostService(
@@ -20,26 +26,63 @@ class PostService(
     ]
 ):
     
+    _cache_entity = 'post'
+
     def __init__(
         self,
         post_repository:PostRepository,
         tag_repository:TagRepository,
+        comment_repository:CommentRepository
     ):
         '''
         service for 'Post'
         '''
         super().__init__(Post,post_repository,{'tags'},True)
         self._tag_repository = tag_repository
+        # tags restored while resolving the tags of the posts being written
+        self._restored_tags:list[str] = []
+        self._comment_repository = comment_repository
+        self._export_fields = ['id','title','content','author_id','created_at','updated_at']
     
+    def _cache_tags(self,instance_id:str,model:Post | None,created:bool) -> list[str]:
+        # the tags of the posts are created along with them
+        return super()._cache_tags(instance_id,model,created) + [list_tag('tag')]
+
+    async def _related_cache_tags(self,instance_ids:Sequence[str]) -> list[str]:
+        # a restored tag is shown again in all its posts
+        restored,self._restored_tags = self._restored_tags,[]
+        post_ids = await self._tag_repository.get_post_ids(restored)
+        return [
+            *[entity_tag('tag',tag_id) for tag_id in restored],
+            *[entity_tag('post',post_id) for post_id in post_ids]
+        ]
+
     async def _process_tags(self,tags:Sequence[PostTagNestedSchema]) -> Sequence[Tag]:
-        result = []
-        for tag in tags:
-            db_tag = await self._tag_repository.get_by_name(tag.name)
-            if db_tag is None:
-                tag_model = Tag(**tag.model_dump())
-                db_tag = await self._tag_repository.create(tag_model)
-            result.append(db_tag)
-        return result
+        tags_,restored = await self._tag_repository.get_or_create_many(
+            [tag.model_dump() for tag in tags]
+        )
+        self._restored_tags.extend(tag.id for tag in restored)
+        return tags_
+
+    async def _process_before_create_many(
+        self,
+        instances: Sequence[Post],
+        create_values: Sequence[PostCreateSchema]
+    ) -> Sequence[Post]:
+        # the tags of all the posts are resolved at once
+        tags = await self._process_tags([
+            tag
+            for create_value in create_values
+            for tag in create_value.tags or []
+        ])
+        tags_by_name = {tag.name:tag for tag in tags}
+        for instance,create_value in zip(instances,create_values):
+            if create_value.tags:
+                instance.tags = list({
+                    tag.name:tags_by_name[tag.name]
+                    for tag in create_value.tags
+                }.values())
+        return instances
 
     async def _process_before_update_modifier(
         self,
@@ -80,17 +123,161 @@ class PostService(
             tags_
         ))
     
-    async def _to_schema(self,model:Post) -> PostSchema:
+    def _build_schema(self,model:Post,comments:Sequence[Comment]) -> PostSchema:
         return PostSchema(
             created_at=model.created_at,
             updated_at=model.updated_at,
             title=model.title,
             content=model.content,
             tags=self._tags_to_schemas(model.tags),
-            comments=self._comments_to_schema(model.comments),
+            comments=self._comments_to_schema(comments),
             id=model.id,
             author_id=model.author_id
         )
+
+    async def _to_schemas(self,models:Sequence[Post]) -> Sequence[PostSchema]:
+        # only the newest comments of each post are embedded, loaded at once
+        # for all the posts
+        if len(models) == 1:
+            comments = {
+                models[0].id:await self._comment_repository.get_by_post(
+                    models[0].id,
+                    ENVIRONMENT.EMBEDDED_COMMENTS_SIZE
+                )
+            }
+        else:
+            comments = await self._comment_repository.get_latest_by_posts(
+                [model.id for model in models],
+                ENVIRONMENT.EMBEDDED_COMMENTS_SIZE
+            )
+        return [
+            self._build_schema(model,comments.get(model.id,[]))
+            for model in models
+        ]
+    
+    async def _to_schema(self,model:Post) -> PostSchema:
+        schemas = await self._to_schemas([model])
+        return schemas[0]
+
+    async def _to_detail(self,model:Post) -> tuple[PostSchema,list[str]]:
+        comments = await self._comment_repository.get_by_post(
+            model.id,
+            ENVIRONMENT.EMBEDDED_COMMENTS_SIZE
+        )
+        # the post shows its tags and the names of the authors of its comments,
+        # the tags invalidate its posts when they change
+        tags = [
+            entity_tag('post',model.id),
+            *{entity_tag('user',comment.author_id) for comment in comments}
+        ]
+        return self._build_schema(model,comments),tags
+
+    async def get_detail(self,post_id:str,include_deleted:bool=False) -> tuple[PostSchema,list[str]] | None:
+        '''
+        gets a post by its id along with the tags of the cached responses that show it
+        '''
+        model = await self._repository.get_by_id(post_id,include_deleted)
+        if model is None:
+            return None
+        return await self._to_detail(model)
+
+    async def get_detail_by_title(self,post_title:str,include_deleted:bool=False) -> tuple[PostSchema,list[str]] | None:
+        '''
+        gets a post by its title along with the tags of the cached responses that show it
+        '''
+        model = await self._repository.get_by_title(post_title,include_deleted)
+        if model is None:
+            return None
+        return await self._to_detail(model)
+    
+    async def get_version(self,instance_id:str,include_deleted:bool=False) -> datetime | None:
+        return await self._repository.get_version(
+            instance_id,
+            include_deleted,
+            ENVIRONMENT.EMBEDDED_COMMENTS_SIZE
+        )
+    
+    def _summary_fields(self,post:Post,excerpt:str) -> dict:
+        return {
+            'created_at':post.created_at,
+            'updated_at':post.updated_at,
+            'id':post.id,
+            'title':post.title,
+            'excerpt':excerpt,
+            'author_id':post.author_id,
+            'author':post.author.username,
+            'tags':[tag.name for tag in post.tags if not tag.is_deleted],
+            'comment_count':post.comment_count,
+            'last_comment_at':post.last_comment_at
+        }
+    
+    async def get_summaries(
+        self,
+        limit:int=100,
+        skip:int=0,
+        include_deleted:bool=False,
+        after:tuple[Any,str] | None=None,
+        sort:PostSummarySort='created_at'
+    ) -> Sequence[PostSummarySchema]:
+        '''
+        gets the summaries of the posts, without loading its comments
+        '''
+        results = await self._repository.get_summaries(
+            ENVIRONMENT.POST_EXCERPT_LENGTH,
+            limit,
+            skip,
+            include_deleted,
+            after,
+            sort
+        )
+        return [
+            PostSummarySchema(**self._summary_fields(post,excerpt))
+            for post,excerpt in results
+        ]
+
+    async def get_summaries_by_tag(
+        self,
+        tag_id:str,
+        limit:int=100,
+        include_deleted:bool=False,
+        after:tuple[datetime,str] | None=None
+    ) -> Sequence[PostSummarySchema]:
+        '''
+        gets the summaries of the posts with a tag, by the id of the tag
+        '''
+        results = await self._repository.get_summaries_by_tag(
+            tag_id,
+            ENVIRONMENT.POST_EXCERPT_LENGTH,
+            limit,
+            include_deleted,
+            after
+        )
+        return [
+            PostSummarySchema(**self._summary_fields(post,excerpt))
+            for post,excerpt in results
+        ]
+
+    async def search(
+        self,
+        text:str,
+        limit:int=100,
+        include_deleted:bool=False,
+        after:tuple[float,str] | None=None
+    ) -> Sequence[PostSearchResultSchema]:
+        '''
+        searches the posts by its title and content, most relevant first
+        '''
+        results = await self._repository.search(
+            text,
+            ENVIRONMENT.POST_EXCERPT_LENGTH,
+            limit,
+            include_deleted,
+            after
+        )
+        return [
+            PostSearchResultSchema(**self._summary_fields(post,excerpt),rank=rank)
+            for post,excerpt,rank in results
+        ]
     
     async def get_by_title(self,post_title:str,include_deleted:bool=False) -> PostSchema | None:
         '''
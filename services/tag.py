@@ -2,6 +2,7 @@ from typing import Sequence
 from repositories import TagRepository
 from models import Tag
 from schemas import TagCreateSchema,TagUpdateSchema,TagSchema
+from cache import entity_tag
 from .base import BaseService
 
 class TagService(
@@ -14,12 +15,22 @@ class TagService(
         ]
     ):
 
+    _cache_entity = 'tag'
+
     def __init__(self,repository:TagRepository):
         '''
         service for 'Tag'
         '''
         super().__init__(Tag,repository)
     
+    async def _related_cache_tags(self,instance_ids:Sequence[str]) -> list[str]:
+        # the posts show its tags, a created tag can be a restored one
+        post_ids = await self._repository.get_post_ids(instance_ids)
+        return [entity_tag('post',post_id) for post_id in post_ids]
+
+    async def _to_schema(self, model: Tag) -> TagSchema:
+        return TagSchema.model_validate(model,from_attributes=True)
+    
     async def _process_before_update_modifier(
         self,
         update_data: TagUpdateSchema,
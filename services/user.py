@@ -3,7 +3,9 @@ from repositories import UserRepository
 from models import User
 from schemas import UserCreateSchema,UserUpdateSchema,UserSchema
 from settings import ENVIRONMENT
+from cache import TOKEN_VERSIONS
 from .base import BaseService
+from .hashing import PASSWORD_HASHER
 
 # class UserService:
 
@@ -104,18 +106,23 @@ class UserService(
     ]
 ):
     
+    _cache_entity = 'user'
+
     def __init__(self,user_repository:UserRepository):
         '''
         repository for 'User'
         '''
         super().__init__(User,user_repository)
-        self._crypt_context = ENVIRONMENT.CRYPT_CONTEXT
+        self._password_hasher = PASSWORD_HASHER
     
-    def _get_instance(self, **fields) -> User:
+    async def _get_instance(self, **fields) -> User:
         password = fields['password']
-        fields['hashed_password'] = self._crypt_context.hash(password)
+        fields['hashed_password'] = await self._password_hasher.hash(password)
         del fields['password']
-        return super()._get_instance(**fields)
+        return await super()._get_instance(**fields)
+    
+    async def _to_schema(self, model: User) -> UserSchema:
+        return UserSchema.model_validate(model,from_attributes=True)
     
     async def _process_before_update_modifier(
         self,
@@ -127,6 +134,42 @@ class UserService(
         model.updated_at = existing_model.updated_at
         model.is_deleted = existing_model.is_deleted
         return model
+
+    async def update(
+        self,
+        instance_id: str,
+        update_instance: UserUpdateSchema,
+        **extra_values
+    ) -> UserSchema | None:
+        # the repository revokes the issued tokens of the user on update and delete
+        result = await super().update(instance_id,update_instance,**extra_values)
+        TOKEN_VERSIONS.invalidate(instance_id)
+        return result
+
+    async def delete(self, instance_id: str) -> bool:
+        result = await super().delete(instance_id)
+        TOKEN_VERSIONS.invalidate(instance_id)
+        return result
+
+    async def get_token_version(self,user_id:str) -> int | None:
+        '''
+        gets the current token version of a user, cached
+        '''
+        version = TOKEN_VERSIONS.get(user_id)
+        if not version is None:
+            return version
+        version = await self._repository.get_token_version(user_id)
+        if not version is None:
+            TOKEN_VERSIONS.set(user_id,version)
+        return version
+
+    async def revoke_tokens(self,user_id:str) -> bool:
+        '''
+        revokes all the issued tokens of a user
+        '''
+        version = await self._repository.revoke_tokens(user_id)
+        TOKEN_VERSIONS.invalidate(user_id)
+        return not version is None
     
     async def authenticate_user(self,username:str,password:str) -> User | None:
         '''
@@ -135,7 +178,7 @@ class UserService(
         user = await self._repository.get_by_username(username)
         if user is None:
             return None
-        if not self._crypt_context.verify(password,user.hashed_password):
+        if not await self._password_hasher.verify(password,user.hashed_password):
             return None
         return user
 
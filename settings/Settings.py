@@ -34,6 +34,37 @@ class EnvironmentSettings:
         self._min_post_title_length:int = int(os.getenv('MIN_POST_TITLE_LENGTH','min length for the title field of post entity'))
         self._max_post_title_length:int = int(os.getenv('MAX_POST_TITLE_LENGTH','max length for the title field of post entity'))
         self._pages_size:int = int(os.getenv('PAGES_SIZE','size of pages in pagination'))
+        self._password_hashing_workers:int = int(os.getenv('PASSWORD_HASHING_WORKERS',str(os.cpu_count() or 1)))
+        self._password_hashing_max_concurrency:int = int(os.getenv('PASSWORD_HASHING_MAX_CONCURRENCY',str(2*(os.cpu_count() or 1))))
+        self._principal_cache_size:int = int(os.getenv('PRINCIPAL_CACHE_SIZE','10000'))
+        self._principal_cache_ttl_seconds:float = float(os.getenv('PRINCIPAL_CACHE_TTL_SECONDS','60'))
+        self._token_claims_cache_size:int = int(os.getenv('TOKEN_CLAIMS_CACHE_SIZE','10000'))
+        self._post_excerpt_length:int = int(os.getenv('POST_EXCERPT_LENGTH','200'))
+        self._embedded_comments_size:int = int(os.getenv('EMBEDDED_COMMENTS_SIZE','10'))
+        self._bulk_max_items:int = int(os.getenv('BULK_MAX_ITEMS','1000'))
+        self._export_batch_size:int = int(os.getenv('EXPORT_BATCH_SIZE','1000'))
+        self._repeated_query_threshold:int = int(os.getenv('REPEATED_QUERY_THRESHOLD','10'))
+        self._db_admission_max_queue:int = int(os.getenv('DB_ADMISSION_MAX_QUEUE','100'))
+        self._db_admission_wait_seconds:float = float(os.getenv('DB_ADMISSION_WAIT_SECONDS','2'))
+        self._db_admission_retry_after_seconds:int = int(os.getenv('DB_ADMISSION_RETRY_AFTER_SECONDS','1'))
+        self._db_replica_urls:list[str] = [url.strip() for url in os.getenv('DB_REPLICA_URLS','').split(',') if url.strip()]
+        self._read_your_writes_seconds:int = int(os.getenv('READ_YOUR_WRITES_SECONDS','5'))
+        self._read_your_writes_max_users:int = int(os.getenv('READ_YOUR_WRITES_MAX_USERS','10000'))
+        self._replica_max_lag_seconds:float = float(os.getenv('REPLICA_MAX_LAG_SECONDS','5'))
+        self._replica_check_interval_seconds:float = float(os.getenv('REPLICA_CHECK_INTERVAL_SECONDS','2'))
+        self._rate_limit_default:str = os.getenv('RATE_LIMIT_DEFAULT','')
+        self._rate_limits:list[str] = [rule.strip() for rule in os.getenv(
+            'RATE_LIMITS',
+            f'POST {self._global_api_prefix}/users/token=10/60,POST {self._global_api_prefix}/users/register=10/60'
+        ).split(',') if rule.strip()]
+        self._rate_limit_shards:int = int(os.getenv('RATE_LIMIT_SHARDS','16'))
+        self._rate_limit_max_keys:int = int(os.getenv('RATE_LIMIT_MAX_KEYS','100000'))
+        self._rate_limit_redis_url:str = os.getenv('RATE_LIMIT_REDIS_URL','')
+        self._response_cache_size:int = int(os.getenv('RESPONSE_CACHE_SIZE','1000'))
+        self._response_cache_ttl_seconds:float = float(os.getenv('RESPONSE_CACHE_TTL_SECONDS','60'))
+        self._response_cache_redis_url:str = os.getenv('RESPONSE_CACHE_REDIS_URL','')
+        self._redis_pool_size:int = int(os.getenv('REDIS_POOL_SIZE','4'))
+        self._redis_cooldown_seconds:float = float(os.getenv('REDIS_COOLDOWN_SECONDS','5'))
 
     @classmethod
     def get_instance(cls):
@@ -48,6 +79,214 @@ class EnvironmentSettings:
         '''
         return self._pages_size
 
+    @property
+    def PASSWORD_HASHING_WORKERS(self) -> int:
+        '''
+        number of processes used to hash and verify passwords
+        '''
+        return self._password_hashing_workers
+
+    @property
+    def PASSWORD_HASHING_MAX_CONCURRENCY(self) -> int:
+        '''
+        max number of password hashing/verification calls running at once
+        '''
+        return self._password_hashing_max_concurrency
+
+    @property
+    def PRINCIPAL_CACHE_SIZE(self) -> int:
+        '''
+        max number of users whose token version is kept in cache
+        '''
+        return self._principal_cache_size
+
+    @property
+    def PRINCIPAL_CACHE_TTL_SECONDS(self) -> float:
+        '''
+        life time in seconds of the cached token versions, the longest a
+        revoked token can still be accepted by other workers
+        '''
+        return self._principal_cache_ttl_seconds
+
+    @property
+    def TOKEN_CLAIMS_CACHE_SIZE(self) -> int:
+        '''
+        max number of access tokens whose verified claims are kept in cache
+        '''
+        return self._token_claims_cache_size
+
+    @property
+    def POST_EXCERPT_LENGTH(self) -> int:
+        '''
+        max length of the content excerpt in post summaries
+        '''
+        return self._post_excerpt_length
+
+    @property
+    def EMBEDDED_COMMENTS_SIZE(self) -> int:
+        '''
+        number of newest comments embedded in a post
+        '''
+        return self._embedded_comments_size
+
+    @property
+    def BULK_MAX_ITEMS(self) -> int:
+        '''
+        max number of items accepted by a bulk operation
+        '''
+        return self._bulk_max_items
+
+    @property
+    def EXPORT_BATCH_SIZE(self) -> int:
+        '''
+        number of rows fetched from the database at once in the exports
+        '''
+        return self._export_batch_size
+
+    @property
+    def REPEATED_QUERY_THRESHOLD(self) -> int:
+        '''
+        times a request can execute the same statement before it's logged as
+        a possible N+1 query
+        '''
+        return self._repeated_query_threshold
+
+    @property
+    def DB_ADMISSION_MAX_QUEUE(self) -> int:
+        '''
+        max number of requests waiting for a database connection, the next
+        ones are rejected
+        '''
+        return self._db_admission_max_queue
+
+    @property
+    def DB_ADMISSION_WAIT_SECONDS(self) -> float:
+        '''
+        max seconds a request waits for a database connection before being
+        rejected
+        '''
+        return self._db_admission_wait_seconds
+
+    @property
+    def DB_ADMISSION_RETRY_AFTER_SECONDS(self) -> int:
+        '''
+        seconds the rejected requests are told to wait before retrying
+        '''
+        return self._db_admission_retry_after_seconds
+
+    @property
+    def DB_REPLICA_URLS(self) -> list[str]:
+        '''
+        urls of the read replicas of the database, in the same form as the
+        database url
+        '''
+        return self._db_replica_urls
+
+    @property
+    def READ_YOUR_WRITES_SECONDS(self) -> int:
+        '''
+        seconds a client reads from the primary after a write, so it sees its
+        own changes
+        '''
+        return self._read_your_writes_seconds
+
+    @property
+    def READ_YOUR_WRITES_MAX_USERS(self) -> int:
+        '''
+        max number of users that wrote recently kept in-process to read from
+        the primary, the clients keeping cookies are not bounded by it
+        '''
+        return self._read_your_writes_max_users
+
+    @property
+    def REPLICA_MAX_LAG_SECONDS(self) -> float:
+        '''
+        max seconds a replica can be behind the primary before its reads fall
+        back to the primary
+        '''
+        return self._replica_max_lag_seconds
+
+    @property
+    def REPLICA_CHECK_INTERVAL_SECONDS(self) -> float:
+        '''
+        seconds between checks of the lag of the replicas
+        '''
+        return self._replica_check_interval_seconds
+
+    @property
+    def RATE_LIMIT_DEFAULT(self) -> str:
+        '''
+        limit of the requests matching no rate limit rule, as 'REQUESTS/SECONDS',
+        empty to not limit them
+        '''
+        return self._rate_limit_default
+
+    @property
+    def RATE_LIMITS(self) -> list[str]:
+        '''
+        rate limits of the routes, as '[METHOD ]PATH=REQUESTS/SECONDS'
+        '''
+        return self._rate_limits
+
+    @property
+    def RATE_LIMIT_SHARDS(self) -> int:
+        '''
+        number of shards of the in-process rate limit state
+        '''
+        return self._rate_limit_shards
+
+    @property
+    def RATE_LIMIT_MAX_KEYS(self) -> int:
+        '''
+        max number of callers tracked in-process by the rate limits
+        '''
+        return self._rate_limit_max_keys
+
+    @property
+    def RATE_LIMIT_REDIS_URL(self) -> str:
+        '''
+        url of the redis server shared by the workers to keep the rate limits,
+        empty to keep them in-process
+        '''
+        return self._rate_limit_redis_url
+
+    @property
+    def RESPONSE_CACHE_SIZE(self) -> int:
+        '''
+        max number of responses in the in-process response cache
+        '''
+        return self._response_cache_size
+
+    @property
+    def RESPONSE_CACHE_TTL_SECONDS(self) -> float:
+        '''
+        life time of the cached responses
+        '''
+        return self._response_cache_ttl_seconds
+
+    @property
+    def RESPONSE_CACHE_REDIS_URL(self) -> str:
+        '''
+        url of the redis server shared by the workers to cache the responses,
+        empty to cache them only in process
+        '''
+        return self._response_cache_redis_url
+
+    @property
+    def REDIS_POOL_SIZE(self) -> int:
+        '''
+        max number of connections of each worker to each redis server
+        '''
+        return self._redis_pool_size
+
+    @property
+    def REDIS_COOLDOWN_SECONDS(self) -> float:
+        '''
+        seconds a redis server is skipped after a failure, the callers fall
+        back to in-process state meanwhile
+        '''
+        return self._redis_cooldown_seconds
+
     @property
     def MIN_POST_TITLE_LENGTH(self):
         '''
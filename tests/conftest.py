@@ -0,0 +1,10 @@
+import os
+import sys
+import dotenv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the application reads its settings at import, the ones of the docker
+# environment are enough as the tests don't reach the database
+sys.path.insert(0,ROOT)
+dotenv.load_dotenv(os.path.join(ROOT,'.env.docker'))
@@ -0,0 +1,69 @@
+import asyncio
+from database import AdmissionControl
+
+def test_requests_over_the_queue_are_rejected():
+    async def scenario():
+        admission = AdmissionControl('test',1,1,5.0)
+        assert await admission.acquire()
+        waiting = asyncio.ensure_future(admission.acquire())
+        await asyncio.sleep(0)
+        assert not await admission.acquire()
+        admission.release()
+        assert await waiting
+        return admission
+    admission = asyncio.run(scenario())
+    assert admission._rejected == {'queue_full':1,'timeout':0}
+    assert admission._in_use == 1
+
+def test_queued_requests_are_rejected_when_the_wait_runs_out():
+    async def scenario():
+        admission = AdmissionControl('test',1,5,0.01)
+        assert await admission.acquire()
+        assert not await admission.acquire()
+        return admission
+    admission = asyncio.run(scenario())
+    assert admission._rejected == {'queue_full':0,'timeout':1}
+    assert len(admission._waiters) == 0
+
+def test_released_slots_are_handed_in_order():
+    async def scenario():
+        admission = AdmissionControl('test',1,5,5.0)
+        order = []
+        async def request(name):
+            await admission.acquire()
+            order.append(name)
+        assert await admission.acquire()
+        requests = [asyncio.ensure_future(request(name)) for name in ('first','second')]
+        await asyncio.sleep(0)
+        admission.release()
+        await asyncio.sleep(0)
+        admission.release()
+        await asyncio.gather(*requests)
+        return order
+    assert asyncio.run(scenario()) == ['first','second']
+
+def test_cancelled_requests_leave_the_queue():
+    async def scenario():
+        admission = AdmissionControl('test',1,5,5.0)
+        assert await admission.acquire()
+        waiting = asyncio.ensure_future(admission.acquire())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.gather(waiting,return_exceptions=True)
+        assert len(admission._waiters) == 0
+        admission.release()
+        return admission
+    assert asyncio.run(scenario())._in_use == 0
+
+def test_slot_handed_to_a_cancelled_request_is_released():
+    async def scenario():
+        admission = AdmissionControl('test',1,5,5.0)
+        assert await admission.acquire()
+        waiting = asyncio.ensure_future(admission.acquire())
+        await asyncio.sleep(0)
+        # the slot is handed and the request is cancelled before it resumes
+        admission.release()
+        waiting.cancel()
+        await asyncio.gather(waiting,return_exceptions=True)
+        return admission
+    assert asyncio.run(scenario())._in_use == 0
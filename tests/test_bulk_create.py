@@ -0,0 +1,49 @@
+from datetime import datetime,timezone
+from types import SimpleNamespace
+import asyncio
+from models import Tag
+from repositories import TagRepository
+from schemas import TagCreateSchema
+from services import TagService
+
+CREATED_AT = datetime(2026,1,1,tzinfo=timezone.utc)
+
+class UpsertSession:
+
+    def __init__(self,existing:set[str]):
+        '''
+        session that answers the multi-row upsert of tags in reverse order,
+        skipping the names of the live tags that already exist
+        '''
+        self.existing = existing
+        self.inserted = []
+
+    async def scalars(self,statement,params=None,**kwargs):
+        if params is None:
+            # the posts linked to the created tags
+            return SimpleNamespace(all=lambda:[])
+        self.inserted.append([values['name'] for values in params])
+        rows = [
+            Tag(**values,created_at=CREATED_AT,updated_at=CREATED_AT,is_deleted=False)
+            for values in reversed(params)
+            if not values['name'] in self.existing
+        ]
+        return SimpleNamespace(all=lambda:rows)
+
+    async def commit(self):
+        pass
+
+def test_bulk_create_keeps_the_order_of_the_items():
+    session = UpsertSession({'taken'})
+    service = TagService(TagRepository(session))
+    items = asyncio.run(service.create_many([
+        TagCreateSchema(name=name,description='description')
+        for name in ('first','taken','second','first')
+    ]))
+
+    # a single multi-row statement, without the repeated names
+    assert session.inserted == [['first','taken','second']]
+    assert [item.index for item in items] == [0,1,2,3]
+    assert [item.created for item in items] == [True,False,True,False]
+    assert [item.item.name for item in items if item.created] == ['first','second']
+    assert items[1].detail == 'Conflicts with an existing item'
@@ -0,0 +1,56 @@
+from datetime import datetime,timezone
+from types import SimpleNamespace
+import asyncio
+import base64
+import pytest
+from fastapi import HTTPException,Response
+from sqlalchemy.dialects import postgresql
+from api.v1.pagination import NEXT_CURSOR_HEADER,encode_cursor,decode_cursor,set_next_cursor
+from repositories import TagRepository
+
+CREATED_AT = datetime(2026,1,1,12,30,tzinfo=timezone.utc)
+
+class RecordingSession:
+
+    def __init__(self):
+        '''
+        session that records the statements and finds nothing
+        '''
+        self.statements = []
+
+    async def execute(self,statement,*args,**kwargs):
+        self.statements.append(statement)
+        return SimpleNamespace(scalars=lambda:SimpleNamespace(all=lambda:[]))
+
+def test_cursor_keeps_the_keyset_position():
+    assert decode_cursor(encode_cursor(CREATED_AT,'id|with|bars')) == (CREATED_AT,'id|with|bars')
+
+@pytest.mark.parametrize('cursor',[
+    '',
+    'not-base64!',
+    base64.urlsafe_b64encode(b'no-separator').decode(),
+    base64.urlsafe_b64encode(b'not-a-date|id').decode()
+])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+def test_next_cursor_is_the_last_item_of_a_full_page():
+    items = [SimpleNamespace(created_at=CREATED_AT,id=id) for id in ('a','b')]
+    response = Response()
+    set_next_cursor(response,items,2)
+    assert decode_cursor(response.headers[NEXT_CURSOR_HEADER]) == (CREATED_AT,'b')
+    response = Response()
+    set_next_cursor(response,items,3)
+    assert not NEXT_CURSOR_HEADER in response.headers
+
+def test_keyset_breaks_the_ties_of_created_at_by_id():
+    session = RecordingSession()
+    asyncio.run(TagRepository(session).get_all(10,5,False,(CREATED_AT,'b')))
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    # the items created at the same instant as the cursor are continued by id
+    assert '(tags.created_at, tags.id) >' in sql
+    assert sql.index('ORDER BY tags.created_at, tags.id') > 0
+    # the offset is ignored when continuing from a cursor
+    assert not 'OFFSET' in sql
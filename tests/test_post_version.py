@@ -0,0 +1,50 @@
+from datetime import datetime,timezone
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+from main import app
+from database import get_database_session
+from api.v1.caching import make_etag
+from settings import ENVIRONMENT
+
+VERSION = datetime(2026,1,1,tzinfo=timezone.utc)
+
+class RecordingSession:
+
+    def __init__(self):
+        '''
+        session that records the statements and answers all of them with
+        the same version
+        '''
+        self.statements = []
+
+    async def scalar(self,statement,*args,**kwargs):
+        self.statements.append(statement)
+        return VERSION
+
+    async def execute(self,statement,*args,**kwargs):
+        raise AssertionError(f'unexpected statement: {statement}')
+
+    async def close(self):
+        pass
+
+def test_not_modified_post_issues_a_single_bounded_query():
+    session = RecordingSession()
+
+    async def get_recording_session():
+        yield session
+
+    app.dependency_overrides[get_database_session] = get_recording_session
+    try:
+        response = TestClient(app).get(
+            f'{ENVIRONMENT.GLOBAL_API_PREFIX}/posts/post-id',
+            headers={'If-None-Match':make_etag(VERSION)}
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 304
+    assert len(session.statements) == 1
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    # the comments are only read through the newest embedded ones
+    assert sql.count('FROM comments') == 1
+    assert 'LIMIT' in sql
@@ -0,0 +1,66 @@
+import pytest
+from middlewares import rate_limit
+from middlewares import RateLimit,TokenBuckets,parse_rate_limit,parse_rate_limit_rule
+
+class Clock:
+
+    def __init__(self):
+        '''
+        monotonic clock moved by hand
+        '''
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit,'monotonic',clock)
+    return clock
+
+def test_rule_matches_method_and_route_path():
+    rule = parse_rate_limit_rule('post /api/v1/posts/{post_id}/comments = 5/60')
+    assert rule.name == 'post /api/v1/posts/{post_id}/comments'
+    assert rule.method == 'POST'
+    assert rule.limit == RateLimit(5,60.0)
+    assert rule.pattern.match('/api/v1/posts/abc/comments')
+    assert not rule.pattern.match('/api/v1/posts/abc/comments/extra')
+
+def test_rule_without_method_matches_any_method():
+    rule = parse_rate_limit_rule('/api/v1/users/token=10/1')
+    assert rule.method is None
+    assert rule.limit.rate == 10.0
+
+@pytest.mark.parametrize('value',['0/60','5/0','-1/60','5'])
+def test_invalid_limit_is_rejected(value):
+    with pytest.raises(ValueError):
+        parse_rate_limit(value)
+
+def test_bucket_allows_the_burst_and_refills_at_its_rate(clock):
+    buckets = TokenBuckets(4,100)
+    limit = RateLimit(2,10.0)
+    assert buckets.take('caller',limit) == 0
+    assert buckets.take('caller',limit) == 0
+    # empty, the next token arrives after 1 / (2 / 10) seconds
+    assert buckets.take('caller',limit) == pytest.approx(5.0)
+    clock.now += 5.0
+    assert buckets.take('caller',limit) == 0
+    assert buckets.take('caller',limit) > 0
+
+def test_buckets_are_kept_by_caller(clock):
+    buckets = TokenBuckets(4,100)
+    limit = RateLimit(1,60.0)
+    assert buckets.take('first',limit) == 0
+    assert buckets.take('second',limit) == 0
+    assert buckets.take('first',limit) > 0
+
+def test_buckets_forget_the_least_recently_used_callers(clock):
+    buckets = TokenBuckets(1,2)
+    limit = RateLimit(1,60.0)
+    for caller in ('first','second','third'):
+        buckets.take(caller,limit)
+    assert len(buckets) == 2
+    # the forgotten bucket starts full again
+    assert buckets.take('first',limit) == 0
+    assert buckets.take('third',limit) > 0
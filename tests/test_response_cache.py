@@ -0,0 +1,53 @@
+import asyncio
+from cache import ResponseCache,CachedResponse,entity_tag,list_tag
+
+RESPONSE = CachedResponse(b'{}',{'content-type':'application/json'})
+
+def test_invalidation_reaches_only_the_responses_with_the_tag():
+    async def scenario():
+        cache = ResponseCache(10,60)
+        _,stamp = await cache.get('post')
+        await cache.set('post',stamp,[entity_tag('post','1'),entity_tag('user','2')],RESPONSE)
+        _,stamp = await cache.get('tags')
+        await cache.set('tags',stamp,[list_tag('tag')],RESPONSE)
+        await cache.invalidate(entity_tag('user','2'))
+        return (await cache.get('post'))[0],(await cache.get('tags'))[0]
+    post,tags = asyncio.run(scenario())
+    assert post is None
+    assert tags == RESPONSE
+
+def test_response_built_before_an_invalidation_is_not_served():
+    async def scenario():
+        cache = ResponseCache(10,60)
+        _,stamp = await cache.get('post')
+        # the data changes while the response is being built
+        await cache.invalidate(entity_tag('post','1'))
+        await cache.set('post',stamp,[entity_tag('post','1')],RESPONSE)
+        return (await cache.get('post'))[0]
+    assert asyncio.run(scenario()) is None
+
+def test_forgotten_tags_invalidate_conservatively():
+    async def scenario():
+        cache = ResponseCache(1,60)
+        _,stamp = await cache.get('post')
+        await cache.invalidate(entity_tag('post','1'))
+        # the version of the first tag is forgotten to keep them bounded
+        await cache.invalidate(entity_tag('post','2'))
+        # an untouched tag could have been the forgotten one
+        await cache.set('post',stamp,[entity_tag('post','3')],RESPONSE)
+        return (await cache.get('post'))[0]
+    assert asyncio.run(scenario()) is None
+
+def test_data_behind_a_recent_change_is_not_cached():
+    async def scenario():
+        cache = ResponseCache(10,60)
+        await cache.invalidate(entity_tag('post','1'))
+        _,stamp = await cache.get('post')
+        await cache.set('post',stamp,[entity_tag('post','1')],RESPONSE,max_delay=30.0)
+        _,stamp = await cache.get('other')
+        await cache.set('other',stamp,[entity_tag('post','2')],RESPONSE,max_delay=30.0)
+        return (await cache.get('post'))[0],(await cache.get('other'))[0],cache
+    post,other,cache = asyncio.run(scenario())
+    assert post is None
+    assert other == RESPONSE
+    assert cache._unsettled == 1